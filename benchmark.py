@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""Benchmark the site generator on synthetic large sites.
+
+Synthetic sites are built from the real config.json, template, assets and
+translation schema, scaled by the number of languages, pages, sections per
+page, feature-category size and blog posts. Each scenario runs generate.py
+in a fresh process, as a clean build and as a no-op incremental build, and
+reports pages/sec, wall time and peak RSS. With --repeat N each build runs N
+times and the fastest wall time is reported: load from other processes only
+ever adds time, so a noisy run does not read as a regression. Results are
+compared against benchmarks/baseline.json.
+"""
+import argparse
+import copy
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+ROOT = Path(__file__).resolve().parent
+GENERATOR = ROOT / 'generate.py'
+BASELINE_FILE = ROOT / 'benchmarks' / 'baseline.json'
+
+# name -> (languages, pages, sections per page, feature-category size, posts per language, paragraphs per post)
+SCENARIOS = {
+    'small': dict(languages=2, pages=6, sections=4, category_size=10, posts=10, post_paragraphs=20),
+    'medium': dict(languages=6, pages=30, sections=6, category_size=20, posts=60, post_paragraphs=40),
+    'large': dict(languages=12, pages=60, sections=8, category_size=40, posts=150, post_paragraphs=80),
+}
+
+POST_PARAGRAPHS = [
+    "Modern enterprises depend on **reliable data** flowing between *sales*, *finance* and *operations*.",
+    "- **Inventory**: real-time stock levels across warehouses\n- **Finance**: automated reconciliation\n- [Learn more](https://example.com/erp)",
+    "## Lessons from the field",
+    "Teams that adopt a single source of truth spend less time reconciling spreadsheets and more time "
+    "serving customers. ***Consistency*** is the quiet superpower of an integrated system.",
+]
+
+def load_json(path: Path) -> Dict[str, Any]:
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def synthesize_site(site_dir: Path, languages: int, pages: int, sections: int, category_size: int,
+                    posts: int, post_paragraphs: int) -> int:
+    """Write a synthetic site into site_dir and return the number of pages it renders."""
+    config = load_json(ROOT / 'config.json')
+    base_translations = load_json(ROOT / 'translations' / f"{config.get('default_language', 'en')}.json")
+    
+    # Section pool from the real config; the blog index gets its own page
+    pool = [s for page in config['pages'] for s in page['sections'] if s['type'] != 'blog_index']
+    blog_index = next(s for page in config['pages'] for s in page['sections'] if s['type'] == 'blog_index')
+    
+    extra_keys = {}
+    for i in range(category_size):
+        extra_keys[f'bench_feature_{i}'] = f'Benchmark feature {i}: generated capability description'
+    
+    synthetic_pages = []
+    for page_idx in range(pages):
+        slug = 'home' if page_idx == 0 else ('blog' if page_idx == 1 else f'page-{page_idx}')
+        nav_key = f'bench_nav_{page_idx}'
+        extra_keys[nav_key] = f'Page {page_idx}'
+        if slug == 'blog':
+            page_sections = [copy.deepcopy(blog_index)]
+        else:
+            page_sections = [copy.deepcopy(pool[(page_idx * sections + n) % len(pool)]) for n in range(sections)]
+            if page_idx == 0:
+                page_sections[0] = copy.deepcopy(next(s for s in pool if s['type'] == 'hero'))
+        for section in page_sections:
+            for category in section.get('categories', []):
+                category['features'] = [f'bench_feature_{i}' for i in range(category_size)]
+        synthetic_pages.append({'slug': slug, 'nav_title': nav_key, 'sections': page_sections})
+    config['pages'] = synthetic_pages
+    
+    real_languages = list(config['languages'].items())
+    lang_codes = []
+    config['languages'] = {}
+    for i in range(languages):
+        code = real_languages[i][0] if i < len(real_languages) else f'x{i}'
+        lang_codes.append(code)
+        config['languages'][code] = {'name': code.upper(), 'phone': f'+1-555-{i:04d}'}
+    config['default_language'] = lang_codes[0]
+    
+    site_dir.mkdir(parents=True, exist_ok=True)
+    (site_dir / 'config.json').write_text(json.dumps(config, indent=2), encoding='utf-8')
+    shutil.copy(ROOT / 'template.html', site_dir / 'template.html')
+    shutil.copytree(ROOT / 'assets', site_dir / 'assets')
+    
+    (site_dir / 'translations').mkdir()
+    for code in lang_codes:
+        bundle = {key: f'{value} [{code}]' for key, value in base_translations.items()}
+        bundle.update({key: f'{value} [{code}]' for key, value in extra_keys.items()})
+        (site_dir / 'translations' / f'{code}.json').write_text(json.dumps(bundle, ensure_ascii=False), encoding='utf-8')
+        
+        blog_dir = site_dir / 'blog' / code
+        blog_dir.mkdir(parents=True)
+        for post_idx in range(posts):
+            body = '\n\n'.join(POST_PARAGRAPHS[n % len(POST_PARAGRAPHS)] for n in range(post_paragraphs))
+            (blog_dir / f'2024-01-{post_idx:04d}-post.md').write_text(
+                f"---\ntitle: Benchmark post {post_idx}\ndate: 2024-01-01\nauthor: Bench\n"
+                f"excerpt: Synthetic post {post_idx} for {code}\n---\n\n# Benchmark post {post_idx}\n\n{body}\n",
+                encoding='utf-8')
+    
+    return languages * (pages + posts)
+
+def run_generator(site_dir: Path, args: List[str]) -> Dict[str, float]:
+    """Run generate.py in site_dir and return its wall time and peak RSS."""
+    start = time.perf_counter()
+    process = subprocess.Popen([sys.executable, str(GENERATOR)] + args, cwd=site_dir,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    _, status, rusage = os.wait4(process.pid, 0)
+    wall = time.perf_counter() - start
+    # wait4 already reaped the child; tell Popen so it does not wait again
+    process.returncode = os.waitstatus_to_exitcode(status)
+    stderr = process.stderr.read().decode('utf-8', 'replace')
+    process.stderr.close()
+    if process.returncode != 0:
+        raise RuntimeError(f"generate.py failed in {site_dir}:\n{stderr}")
+    # ru_maxrss of the child (KiB on Linux); with --jobs this is the largest single process
+    return {'wall_seconds': wall, 'peak_rss_kb': rusage.ru_maxrss}
+
+def run_repeated(site_dir: Path, args: List[str], repeat: int) -> Dict[str, float]:
+    """Run generate.py repeat times and return the fastest wall time and the largest peak RSS."""
+    runs = [run_generator(site_dir, args) for _ in range(repeat)]
+    return {
+        'wall_seconds': min(run['wall_seconds'] for run in runs),
+        'peak_rss_kb': max(run['peak_rss_kb'] for run in runs),
+    }
+
+def run_scenario(name: str, params: Dict[str, int], jobs: int, keep: bool, repeat: int = 1) -> Dict[str, Any]:
+    site_dir = Path(tempfile.mkdtemp(prefix=f'erp-bench-{name}-'))
+    try:
+        page_count = synthesize_site(site_dir, **params)
+        full = run_repeated(site_dir, ['--clean', '--jobs', str(jobs)], repeat)
+        # The last clean build left a complete manifest, so every no-op run finds nothing to do
+        noop = run_repeated(site_dir, ['--jobs', str(jobs)], repeat)
+    finally:
+        if keep:
+            print(f"  site kept in {site_dir}")
+        else:
+            shutil.rmtree(site_dir, ignore_errors=True)
+    return {
+        'params': params,
+        'jobs': jobs,
+        'repeat': repeat,
+        'pages': page_count,
+        'pages_per_second': page_count / full['wall_seconds'],
+        'wall_seconds': full['wall_seconds'],
+        'peak_rss_kb': full['peak_rss_kb'],
+        'noop_wall_seconds': noop['wall_seconds'],
+    }
+
+def compare(name: str, result: Dict[str, Any], baseline: Optional[Dict[str, Any]], threshold: float) -> List[str]:
+    """Return regression messages for metrics that got worse than baseline by more than threshold."""
+    if not baseline:
+        return []
+    if baseline.get('params') != result['params'] or baseline.get('jobs') != result['jobs']:
+        return [f"{name}: baseline was recorded with different parameters, not compared"]
+    regressions = []
+    for metric in ('wall_seconds', 'noop_wall_seconds', 'peak_rss_kb'):
+        before, after = baseline.get(metric), result[metric]
+        if before and after > before * (1 + threshold):
+            regressions.append(f"{name}: {metric} {before:.3f} -> {after:.3f} (+{(after / before - 1) * 100:.0f}%)")
+    return regressions
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Benchmark generate.py on synthetic sites.')
+    parser.add_argument('scenarios', nargs='*', default=list(SCENARIOS),
+                        help=f"scenarios to run ({', '.join(SCENARIOS)}; default: all)")
+    parser.add_argument('-j', '--jobs', type=int, default=1, help='--jobs passed to generate.py (default: 1)')
+    parser.add_argument('--custom', metavar='KEY=VALUE', nargs='+',
+                        help='run one custom scenario, e.g. --custom languages=4 pages=20 posts=50')
+    parser.add_argument('--repeat', type=int, default=5, metavar='N',
+                        help='run each build N times and compare the fastest wall time (default: 5)')
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help='flag a regression when a metric is worse than baseline by this fraction (default: 0.25)')
+    parser.add_argument('--update-baseline', action='store_true', help=f'store the results in {BASELINE_FILE.relative_to(ROOT)}')
+    parser.add_argument('--keep', action='store_true', help='keep the synthetic site directories')
+    return parser.parse_args(argv)
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    
+    if args.repeat < 1:
+        raise SystemExit('--repeat must be at least 1')
+    scenarios = {name: SCENARIOS[name] for name in args.scenarios}
+    if args.custom:
+        params = dict(SCENARIOS['small'])
+        for item in args.custom:
+            key, value = item.split('=', 1)
+            if key not in params:
+                raise SystemExit(f"Unknown parameter '{key}' (expected one of {', '.join(params)})")
+            params[key] = int(value)
+        scenarios = {'custom': params}
+    
+    baselines = load_json(BASELINE_FILE) if BASELINE_FILE.exists() else {}
+    results = {}
+    regressions = []
+    for name, params in scenarios.items():
+        print(f"Running {name}: {', '.join(f'{k}={v}' for k, v in params.items())}")
+        result = results[name] = run_scenario(name, params, args.jobs, args.keep, args.repeat)
+        print(f"  {result['pages']} pages in {result['wall_seconds']:.2f} s "
+              f"({result['pages_per_second']:.0f} pages/s), peak RSS {result['peak_rss_kb'] / 1024:.1f} MiB, "
+              f"no-op rebuild {result['noop_wall_seconds']:.2f} s"
+              + (f" (best of {args.repeat})" if args.repeat > 1 else ''))
+        regressions.extend(compare(name, result, baselines.get(name), args.threshold))
+    
+    if args.update_baseline:
+        baselines.update(results)
+        BASELINE_FILE.parent.mkdir(exist_ok=True)
+        BASELINE_FILE.write_text(json.dumps(baselines, indent=2) + '\n', encoding='utf-8')
+        print(f"Baseline written to {BASELINE_FILE.relative_to(ROOT)}")
+        return 0
+    
+    for message in regressions:
+        print(f"REGRESSION {message}")
+    return 1 if any('not compared' not in message for message in regressions) else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
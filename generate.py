@@ -1,93 +1,325 @@
 #!/usr/bin/env python3
 import json
-from pathlib import Path
-from typing import Dict, Any, List, Optional
+from pathlib import Path, PurePosixPath
+from typing import Callable, Dict, Any, List, NamedTuple, Optional, Set, Tuple
+import argparse
+import gzip
+import hashlib
+import importlib.util
+import os
 import shutil
+import sys
+import ctypes
+import contextlib
+import time
+import tracemalloc
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows
+    resource = None
+
+try:
+    import inotify_simple
+except ImportError:
+    inotify_simple = None
+
+try:
+    from PIL import Image
+except ImportError:
+    # Responsive image derivatives are skipped without Pillow
+    Image = None
+
+try:
+    import brotli
+except ImportError:
+    # Only .gz siblings are written without brotli
+    brotli = None
 import base64
 import re
+import html as html_lib
+from urllib.parse import quote, unquote, urlsplit
+
+class BuildProfiler:
+    """Wall time per build stage and per page, output sizes and peak memory (--profile)."""
+    
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages: Dict[str, List[float]] = {}
+        self.pages: Dict[str, float] = {}
+        self.output_sizes: Dict[str, int] = {}
+        self.minify_savings: Dict[str, int] = {}
+    
+    @contextlib.contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+    
+    def add(self, name: str, seconds: float, calls: int = 1) -> None:
+        totals = self.stages.setdefault(name, [0.0, 0])
+        totals[0] += seconds
+        totals[1] += calls
+    
+    def drain(self) -> Dict[str, Any]:
+        """Return and reset what was recorded, to ship it from a worker to the main process."""
+        data = {'stages': self.stages, 'pages': self.pages, 'minify_savings': self.minify_savings}
+        self.stages = {}
+        self.pages = {}
+        self.minify_savings = {}
+        return data
+    
+    def merge(self, data: Dict[str, Any]) -> None:
+        for name, (seconds, calls) in data['stages'].items():
+            self.add(name, seconds, calls)
+        self.pages.update(data['pages'])
+        self.minify_savings.update(data['minify_savings'])
+    
+    def report(self) -> Dict[str, Any]:
+        report = {
+            'total_seconds': time.perf_counter() - self.started,
+            'stages': {name: {'seconds': seconds, 'calls': calls}
+                       for name, (seconds, calls) in sorted(self.stages.items(), key=lambda item: -item[1][0])},
+            'pages': {rel_path: {'render_seconds': self.pages.get(rel_path), 'bytes': self.output_sizes.get(rel_path),
+                                 'minify_saved_bytes': self.minify_savings.get(rel_path)}
+                      for rel_path in sorted(self.pages.keys() | self.output_sizes.keys())},
+            'bytes_written': sum(self.output_sizes.values()),
+        }
+        if self.minify_savings:
+            report['minify_saved_bytes'] = sum(self.minify_savings.values())
+        if tracemalloc.is_tracing():
+            report['peak_traced_memory_bytes'] = tracemalloc.get_traced_memory()[1]
+        if resource is not None:
+            report['peak_rss_kb'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            report['peak_rss_children_kb'] = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+        return report
+    
+    def summary(self, report: Dict[str, Any], top: int = 10) -> str:
+        lines = [f"Build profile: {report['total_seconds'] * 1000:.0f} ms total, "
+                 f"{report['bytes_written'] / 1024:.1f} KiB written"]
+        if 'peak_traced_memory_bytes' in report:
+            lines.append(f"Peak traced memory: {report['peak_traced_memory_bytes'] / 1024 / 1024:.1f} MiB")
+        if 'minify_saved_bytes' in report:
+            saved = report['minify_saved_bytes']
+            lines.append(f"HTML minification saved {saved / 1024:.1f} KiB "
+                         f"({saved / (saved + report['bytes_written']) * 100:.0f}% of the unminified pages)")
+        lines.append("Stages (nested stages are also counted in their parent; worker time is summed):")
+        for name, stage in list(report['stages'].items())[:top]:
+            lines.append(f"  {stage['seconds'] * 1000:9.1f} ms  {stage['calls']:6d}x  {name}")
+        slowest = sorted(((page['render_seconds'], rel_path) for rel_path, page in report['pages'].items()
+                          if page['render_seconds'] is not None), reverse=True)[:top]
+        if slowest:
+            lines.append("Slowest pages:")
+            lines.extend(f"  {seconds * 1000:9.1f} ms  {rel_path}" for seconds, rel_path in slowest)
+        largest = sorted(((page['bytes'], rel_path) for rel_path, page in report['pages'].items()
+                          if page['bytes'] is not None), reverse=True)[:top]
+        if largest:
+            lines.append("Largest outputs:")
+            lines.extend(f"  {size / 1024:9.1f} KiB  {rel_path}" for size, rel_path in largest)
+        savings = sorted(((page['minify_saved_bytes'], rel_path) for rel_path, page in report['pages'].items()
+                          if page['minify_saved_bytes'] is not None), reverse=True)[:top]
+        if savings:
+            lines.append("Largest minification savings:")
+            lines.extend(f"  {saved / 1024:9.1f} KiB  {rel_path}" for saved, rel_path in savings)
+        return '\n'.join(lines)
+
+# Set by main() when --profile is given; None means profiling is off
+PROFILER: Optional[BuildProfiler] = None
+
+def profile_stage(name: str):
+    """Time a block as a build stage when profiling, do nothing otherwise."""
+    if PROFILER is None:
+        return contextlib.nullcontext()
+    return PROFILER.stage(name)
 
 def load_json(path: str) -> Dict[str, Any]:
     with open(path, 'r', encoding='utf-8') as f:
         return json.load(f)
 
-def load_foam_svg() -> str:
-    """Load foam.svg content for inline use"""
-    foam_path = Path('assets/foam.svg')
-    if foam_path.exists():
-        with open(foam_path, 'r', encoding='utf-8') as f:
-            svg_content = f.read()
-            # Remove XML declaration and adjust style for inline use
-            svg_content = svg_content.replace('<?xml version="1.0" encoding="utf-8"?>', '')
-            svg_content = svg_content.replace('style="margin: auto; background: none; display: block; z-index: 1; position: relative; shape-rendering: auto;"', 
-                                             'style="position: absolute; top: 50%; left: 50%; width: 150%; height: 150%; z-index: 1; opacity: 0.3; transform: translate(-50%, -50%) scale(1.5); pointer-events: none;"')
-            return svg_content
-    return ''
+# Block syntax of the markdown converter. One scan over the document yields
+# fenced code blocks, headers, runs of list items and paragraphs; blank lines
+# between blocks are skipped by the scanner.
+MD_BLOCK = re.compile(r"""
+    ^[ \t]*```[ \t]*(?P<fence_lang>[^\n]*)\n(?P<fence>.*?)(?:^[ \t]*```[ \t]*$|\Z)
+  | ^(?P<hashes>\#{1,6})\ (?P<header>[^\n]*)$
+  | (?P<list>(?:^[ \t]*-\ [^\n]*(?:\n|\Z))+)
+  | (?P<para>(?:^(?![ \t]*(?:```|-\ )|\#{1,6}\ )[^\n]*\S[^\n]*(?:\n|\Z))+)
+""", re.MULTILINE | re.DOTALL | re.VERBOSE)
+
+# Inline syntax. The lookahead lets the scanner skip plain text without
+# trying every alternative.
+MD_INLINE = re.compile(
+    r'(?=[`!\[*])(?:'
+    r'(?P<code>`(?P<code_text>[^`]+)`)'
+    r'|(?P<image>!\[(?P<alt>[^\]]*)\]\((?P<src>[^)]*)\))'
+    r'|(?P<link>\[(?P<link_text>[^\]]*)\]\((?P<href>[^)]*)\))'
+    r'|\*\*\*(?P<strong_em>.+?)\*\*\*'
+    r'|\*\*(?P<strong>.+?)\*\*'
+    # Emphasis may contain strong runs: '*a **b** c*' is <em>a <strong>b</strong> c</em>
+    r'|\*(?P<em>(?:\*\*\*[^*\n]+?\*\*\*|\*\*[^*\n]+?\*\*|[^*\n])+)\*(?!\*)'
+    r')'
+)
+
+def markdown_inline_to_html(text: str) -> str:
+    """Convert inline markdown (code, images, links, emphasis) in one scan of the text."""
+    if '*' not in text and '[' not in text and '`' not in text:
+        return text
+    out = []
+    pos = 0
+    for m in MD_INLINE.finditer(text):
+        out.append(text[pos:m.start()])
+        pos = m.end()
+        kind = m.lastgroup
+        if m.group('code') is not None:
+            out.append(f"<code>{html_lib.escape(m.group('code_text'), quote=False)}</code>")
+        elif m.group('image') is not None:
+            out.append(f'<img src="{m.group("src")}" alt="{m.group("alt")}">')
+        elif m.group('link') is not None:
+            out.append(f'<a href="{m.group("href")}">{markdown_inline_to_html(m.group("link_text"))}</a>')
+        elif kind == 'strong_em':
+            out.append(f'<strong><em>{markdown_inline_to_html(m.group(kind))}</em></strong>')
+        elif kind == 'strong':
+            out.append(f'<strong>{markdown_inline_to_html(m.group(kind))}</strong>')
+        else:
+            out.append(f'<em>{markdown_inline_to_html(m.group(kind))}</em>')
+    out.append(text[pos:])
+    return ''.join(out)
 
 def simple_markdown_to_html(md_text: str) -> str:
-    """Convert basic markdown to HTML"""
-    html = md_text
-    
-    # Headers
-    html = re.sub(r'^### (.*?)$', r'<h3>\1</h3>', html, flags=re.MULTILINE)
-    html = re.sub(r'^## (.*?)$', r'<h2>\1</h2>', html, flags=re.MULTILINE)
-    html = re.sub(r'^# (.*?)$', r'<h1>\1</h1>', html, flags=re.MULTILINE)
-    
-    # Bold and italic
-    html = re.sub(r'\*\*\*(.*?)\*\*\*', r'<strong><em>\1</em></strong>', html)
-    html = re.sub(r'\*\*(.*?)\*\*', r'<strong>\1</strong>', html)
-    html = re.sub(r'\*(.*?)\*', r'<em>\1</em>', html)
-    
-    # Links
-    html = re.sub(r'\[(.*?)\]\((.*?)\)', r'<a href="\2">\1</a>', html)
-    
-    # Lists
-    lines = html.split('\n')
-    in_list = False
-    result = []
-    for line in lines:
-        if line.strip().startswith('- '):
-            if not in_list:
-                result.append('<ul>')
-                in_list = True
-            result.append(f'<li>{line.strip()[2:]}</li>')
+    """Convert basic markdown to HTML with a single-pass block and inline tokenizer.
+    
+    Supports headers, emphasis, links, images, inline code, '- ' lists,
+    fenced code blocks and paragraphs.
+    """
+    blocks = []
+    for m in MD_BLOCK.finditer(md_text):
+        kind = m.lastgroup
+        if kind == 'para':
+            blocks.append(f"<p>{markdown_inline_to_html(m.group('para').rstrip(chr(10)))}</p>")
+        elif kind == 'list':
+            items = [line.strip()[2:] for line in m.group('list').split('\n') if line.strip()]
+            blocks.append('<ul>\n' + '\n'.join(f'<li>{markdown_inline_to_html(item)}</li>' for item in items) + '\n</ul>')
+        elif kind == 'header':
+            level = len(m.group('hashes'))
+            blocks.append(f"<h{level}>{markdown_inline_to_html(m.group('header'))}</h{level}>")
         else:
-            if in_list:
-                result.append('</ul>')
-                in_list = False
-            result.append(line)
-    if in_list:
-        result.append('</ul>')
-    html = '\n'.join(result)
-    
-    # Paragraphs
-    html = re.sub(r'\n\n+', '</p><p>', html)
-    html = f'<p>{html}</p>'
-    
-    # Clean up empty paragraphs and extra tags
-    html = re.sub(r'<p>\s*</p>', '', html)
-    html = re.sub(r'<p>\s*(<h[1-6]>)', r'\1', html)
-    html = re.sub(r'(</h[1-6]>)\s*</p>', r'\1', html)
-    html = re.sub(r'<p>\s*(<ul>)', r'\1', html)
-    html = re.sub(r'(</ul>)\s*</p>', r'\1', html)
+            fence_lang = m.group('fence_lang').strip()
+            lang_class = f' class="language-{fence_lang}"' if fence_lang else ''
+            code = html_lib.escape(m.group('fence').rstrip('\n'), quote=False)
+            blocks.append(f'<pre><code{lang_class}>{code}</code></pre>')
+    return ''.join(blocks)
+
+class Translations(dict):
+    """Translation strings of one language; unknown keys translate to themselves.
     
-    return html
+    Plain indexing (lang_data[key]) is the fast lookup: hits are a single dict
+    lookup and misses fall back to the key through __missing__.
+    """
+    
+    def __missing__(self, key: str) -> str:
+        return key
 
+class RecordingTranslations(dict):
+    """Read-only view of a translation bundle that records every key looked up.
+    
+    A key is copied from the bundle on its first lookup (through __missing__),
+    so the view's own keys are the keys read and repeated lookups are plain
+    dict hits. Missing keys translate to themselves, as in Translations.
+    """
+    
+    def __init__(self, bundle: Dict[str, str]):
+        super().__init__()
+        self.bundle = bundle
+        self.missing: Set[str] = set()
+    
+    def __missing__(self, key: str) -> str:
+        value = self.bundle.get(key)
+        if value is None:
+            self.missing.add(key)
+            value = key
+        self[key] = value
+        return value
+    
+    def get(self, key: str, default: Any = None) -> Any:
+        value = self[key]
+        return default if key in self.missing else value
+    
+    @property
+    def reads(self) -> Dict[str, Optional[str]]:
+        """The keys looked up and the values found (None if missing)."""
+        return {key: None if key in self.missing else value for key, value in self.items()}
+    
+    def record(self, reads: Dict[str, Optional[str]]) -> None:
+        """Add reads made earlier through another view, e.g. by a memoized fragment."""
+        for key, value in reads.items():
+            if value is None:
+                self.missing.add(key)
+                value = key
+            self[key] = value
 
-def load_svg_as_base64(path: str) -> Optional[str]:
-    """Load an SVG file and return it as a base64 data URI."""
-    try:
-        svg_path = Path(path)
-        if svg_path.exists():
-            with open(svg_path, 'rb') as f:
-                svg_data = f.read()
-                b64_data = base64.b64encode(svg_data).decode('utf-8')
-                return f"data:image/svg+xml;base64,{b64_data}"
-    except Exception as e:
-        print(f"Warning: Could not load SVG {path}: {e}")
-    return None
+def replay_translation_reads(lang_data: Dict[str, str], reads: Dict[str, Optional[str]]) -> None:
+    """Report the reads of a memoized fragment to lang_data when it is recording."""
+    if isinstance(lang_data, RecordingTranslations):
+        lang_data.record(reads)
+
+class TranslationStore:
+    """Translation bundles, loaded and validated once per build and shared by all renderers."""
+    
+    def __init__(self, languages: List[str], default_language: Optional[str] = None, directory: str = 'translations'):
+        self.languages = list(languages)
+        self.default_language = default_language or self.languages[0]
+        self.directory = Path(directory)
+        self.bundles: Dict[str, Translations] = {}
+    
+    def path(self, lang: str) -> Path:
+        return self.directory / f'{lang}.json'
+    
+    def get(self, lang: str) -> Translations:
+        bundle = self.bundles.get(lang)
+        if bundle is None:
+            bundle = self.bundles[lang] = self._load(lang)
+        return bundle
+    
+    __getitem__ = get
+    
+    def load_all(self) -> 'TranslationStore':
+        for lang in self.languages:
+            self.get(lang)
+        return self
+    
+    def invalidate(self, lang: str) -> None:
+        """Forget a bundle so that the next lookup reloads it from disk."""
+        self.bundles.pop(lang, None)
+    
+    def _load(self, lang: str) -> Translations:
+        path = self.path(lang)
+        data = load_json(str(path))
+        if not isinstance(data, dict):
+            raise ValueError(f"{path}: expected a JSON object of translation strings")
+        
+        bundle = Translations()
+        for key, value in data.items():
+            if not isinstance(value, str):
+                print(f"Warning: {path}: value of '{key}' is not a string")
+                value = str(value)
+            bundle[key] = value
+        
+        if lang != self.default_language and self.default_language in self.languages:
+            missing = sorted(self.get(self.default_language).keys() - bundle.keys())
+            if missing:
+                print(f"Warning: {path}: {len(missing)} keys missing compared to {self.default_language} "
+                      f"({', '.join(missing[:5])}{', ...' if len(missing) > 5 else ''})")
+        return bundle
 
 def translate(key: str, lang_data: Dict[str, str]) -> str:
-    return lang_data.get(key, key)
+    try:
+        # Translations fall back to the key by themselves, plain dicts raise
+        return lang_data[key]
+    except KeyError:
+        return key
 
 def get_image_url(section: Dict[str, Any], lang: str) -> str:
     images = section.get('image', {})
@@ -99,27 +331,32 @@ def render_nav_logo(config: Dict[str, Any], lang_data: Dict[str, str], has_gradi
     """Render the navigation logo, trying SVG first, then falling back to text."""
     # Determine which logo to use based on background
     logo_file = 'assets/logo-dark.svg' if has_gradient else 'assets/logo-light.svg'
-    logo_data = load_svg_as_base64(logo_file)
-    
-    if logo_data:
-        brand_text = translate('site_brand', lang_data)
-        return f'<img src="{logo_data}" alt="{brand_text}" aria-label="{brand_text}">'
-    else:
+    return logo_html(logo_file, lang_data, config.get('base_url', ''))
+
+def logo_html(logo_file: str, lang_data: Dict[str, str], base_url: str) -> str:
+    """Render a logo under the asset inlining policy: inline SVG, a data URI or an external file."""
+    brand_text = translate('site_brand', lang_data)
+    assets = current_assets()
+    if not assets.exists(logo_file):
         # Fallback to text
-        return translate('site_brand', lang_data)
+        return brand_text
+    inlined = assets.inlined(logo_file, markup=True)
+    if inlined and inlined.startswith('<svg'):
+        return f'<svg role="img" aria-label="{brand_text}"{inlined[4:]}'
+    src = inlined or asset_url(f'/{logo_file}', base_url)
+    return f'<img src="{src}" alt="{brand_text}" aria-label="{brand_text}">'
 
-def render_nav(config: Dict[str, Any], lang_data: Dict[str, str], current_page: str, lang: str) -> str:
+def render_nav_links(config: Dict[str, Any], lang_data: Dict[str, str], lang: str) -> Tuple[List[Tuple[str, str, str]], str]:
+    """Render the nav links of a language once, as (slug, inactive html, active html) plus the docs link."""
     base_url = config.get('base_url', '')
     links = []
     for page in config['pages']:
         slug = page['slug']
-        # Skip "home" nav item when we're on the home page
-        if slug == 'home' and current_page == 'home':
-            continue
         title = translate(page['nav_title'], lang_data)
-        active = 'active' if slug == current_page else ''
         url = f"{base_url}/{lang}/{slug}.html" if slug != 'home' else f"{base_url}/{lang}/"
-        links.append(f'<a href="{url}" class="{active}" role="menuitem">{title}</a>')
+        links.append((slug,
+                      f'<a href="{url}" class="" role="menuitem">{title}</a>',
+                      f'<a href="{url}" class="active" role="menuitem">{title}</a>'))
     
     # Add docs link (external, language-specific)
     docs_url_config = config.get('docs_url', '#')
@@ -129,9 +366,20 @@ def render_nav(config: Dict[str, Any], lang_data: Dict[str, str], current_page:
         docs_url = docs_url_config
     docs_title = translate('nav_docs', lang_data)
     docs_label = translate('nav_docs_label', lang_data)
-    links.append(f'<a href="{docs_url}" target="_blank" rel="noopener noreferrer" role="menuitem" aria-label="{docs_label}">{docs_title}</a>')
+    docs_link = f'<a href="{docs_url}" target="_blank" rel="noopener noreferrer" role="menuitem" aria-label="{docs_label}">{docs_title}</a>'
     
-    return ' '.join(links)
+    return links, docs_link
+
+def assemble_nav(nav_links: Tuple[List[Tuple[str, str, str]], str], current_page: str) -> str:
+    links, docs_link = nav_links
+    parts = []
+    for slug, inactive_html, active_html in links:
+        # Skip "home" nav item when we're on the home page
+        if slug == 'home' and current_page == 'home':
+            continue
+        parts.append(active_html if slug == current_page else inactive_html)
+    parts.append(docs_link)
+    return ' '.join(parts)
 
 def render_lang_switcher(config: Dict[str, Any], current_page: str, current_lang: str) -> str:
     base_url = config.get('base_url', '')
@@ -143,6 +391,55 @@ def render_lang_switcher(config: Dict[str, Any], current_page: str, current_lang
             links.append(f'<a href="{url}" role="menuitem" lang="{l}">{ldata["name"]}</a>')
     return ' '.join(links)  # Join without divider
 
+class PageChrome:
+    """Navigation, language switcher and logo shared by every page of a build.
+    
+    Nav links are rendered once per language and only the active marker
+    varies per page; assembled fragments are memoized per (language, page),
+    and the logo once per (language, background), together with the
+    translation keys they read so that key tracking sees them on every page.
+    """
+    
+    def __init__(self, config: Dict[str, Any]):
+        self.config = config
+        self._nav_links: Dict[str, Tuple[List[Tuple[str, str, str]], str]] = {}
+        # Translation reads of the memoized fragments, replayed for every page that uses them
+        self._nav_reads: Dict[str, Dict[str, Optional[str]]] = {}
+        self._logo_reads: Dict[Tuple[str, bool], Dict[str, Optional[str]]] = {}
+        self._nav: Dict[Tuple[str, str], str] = {}
+        self._switchers: Dict[Tuple[str, str], str] = {}
+        self._logos: Dict[Tuple[str, bool], str] = {}
+    
+    def nav(self, lang: str, lang_data: Dict[str, str], current_page: str) -> str:
+        key = (lang, current_page)
+        html = self._nav.get(key)
+        if html is None:
+            nav_links = self._nav_links.get(lang)
+            if nav_links is None:
+                recording = RecordingTranslations(lang_data)
+                nav_links = self._nav_links[lang] = render_nav_links(self.config, recording, lang)
+                self._nav_reads[lang] = recording.reads
+            html = self._nav[key] = assemble_nav(nav_links, current_page)
+        replay_translation_reads(lang_data, self._nav_reads[lang])
+        return html
+    
+    def lang_switcher(self, lang: str, current_page: str) -> str:
+        key = (lang, current_page)
+        html = self._switchers.get(key)
+        if html is None:
+            html = self._switchers[key] = render_lang_switcher(self.config, current_page, lang)
+        return html
+    
+    def logo(self, lang: str, lang_data: Dict[str, str], has_gradient: bool) -> str:
+        key = (lang, has_gradient)
+        html = self._logos.get(key)
+        if html is None:
+            recording = RecordingTranslations(lang_data)
+            html = self._logos[key] = render_nav_logo(self.config, recording, has_gradient)
+            self._logo_reads[key] = recording.reads
+        replay_translation_reads(lang_data, self._logo_reads[key])
+        return html
+
 def render_hero(section: Dict[str, Any], lang_data: Dict[str, str], config: Dict[str, Any], lang: str) -> str:
     title = translate(section['title'], lang_data)
     subtitle = translate(section.get('subtitle', ''), lang_data)
@@ -170,17 +467,12 @@ def render_hero(section: Dict[str, Any], lang_data: Dict[str, str], config: Dict
         width = ''
         height = ''
     
-    if media_url and not media_url.startswith('http'):
-        media_url = base_url + media_url
-    
-    size_attrs = ''
-    if width:
-        size_attrs += f' width="{width}"'
-    if height:
-        size_attrs += f' height="{height}"'
+    size_attrs = media_size_attrs(media_url, width, height)
+    media_ref = media_url
+    media_url = asset_url(media_url, base_url)
     
-    # Load foam SVG inline
-    foam_svg = load_foam_svg()
+    # Foam decoration behind the media (inline, <use> of a sprite or an external image)
+    foam_svg = render_foam_svg(config)
     
     # Generate media HTML (image or video with foam.svg behind)
     media_html = ''
@@ -193,7 +485,7 @@ def render_hero(section: Dict[str, Any], lang_data: Dict[str, str], config: Dict
         else:
             media_html = f'''<div class="hero-image-wrapper">
                 {foam_svg}
-                <img src="{media_url}" alt="{title}" class="hero-image"{size_attrs}>
+                {render_image(media_ref, base_url, f' alt="{title}" class="hero-image"{size_attrs}', section.get('sizes'))}
             </div>'''
     
     # Generate CTA buttons
@@ -283,16 +575,8 @@ def render_text_section(section: Dict[str, Any], lang_data: Dict[str, str], lang
         width = ''
         height = ''
     
-    if image_url and not image_url.startswith('http'):
-        image_url = base_url + image_url
-    
-    size_attrs = ''
-    if width:
-        size_attrs += f' width="{width}"'
-    if height:
-        size_attrs += f' height="{height}"'
-    
-    image_html = f'<img src="{image_url}" alt="{title}"{size_attrs}>' if image_url else ''
+    size_attrs = media_size_attrs(image_url, width, height)
+    image_html = render_image(image_url, base_url, f' alt="{title}"{size_attrs}', section.get('sizes')) if image_url else ''
     
     # Create aria-describedby from content preview (first 200 chars)
     content_preview = content.replace('<p>', '').replace('</p>', ' ').strip()[:200]
@@ -386,37 +670,23 @@ def render_feature_card(feature: Dict[str, Any], lang_data: Dict[str, str], base
     
     media_html = ''
     if media_config:
-        if not media_config.startswith('http'):
-            media_url = base_url + media_config
-        else:
-            media_url = media_config
+        media_url = asset_url(media_config, base_url)
         
         # Check if image file exists (for local files)
         if not media_config.startswith('http'):
-            # Remove leading slash and 'assets/' if present to avoid double path
-            clean_path = media_config.lstrip('/').replace('assets/', '', 1)
-            image_path = Path('assets') / clean_path
-            if not image_path.exists():
-                print(f"Warning: Image not found: {image_path} for feature '{feat_title}' - skipping image")
+            if not current_assets().exists(media_config):
+                # Missing assets are reported once per build by report_missing_assets
                 media_html = ''
             else:
-                size_attrs = ''
-                if width:
-                    size_attrs += f' width="{width}"'
-                if height:
-                    size_attrs += f' height="{height}"'
+                size_attrs = media_size_attrs(media_config, width, height)
                 
                 if media_type == 'video':
                     media_html = f'<video src="{media_url}" class="feature-video" autoplay loop muted playsinline{size_attrs} aria-label="{feat_title}"></video>'
                 else:
-                    media_html = f'<img src="{media_url}" alt="{feat_title}" class="feature-image"{size_attrs}>'
+                    media_html = render_image(media_config, base_url, f' alt="{feat_title}" class="feature-image"{size_attrs}', feature.get('sizes'))
         else:
             # External URLs - assume they work
-            size_attrs = ''
-            if width:
-                size_attrs += f' width="{width}"'
-            if height:
-                size_attrs += f' height="{height}"'
+            size_attrs = media_size_attrs(media_config, width, height)
             
             if media_type == 'video':
                 media_html = f'<video src="{media_url}" class="feature-video" autoplay loop muted playsinline{size_attrs} aria-label="{feat_title}"></video>'
@@ -800,7 +1070,8 @@ def parse_blog_post(file_path: Path) -> Optional[Dict[str, Any]]:
         markdown_content = re.sub(r'^#\s+.*?$', '', markdown_content, count=1, flags=re.MULTILINE).strip()
         
         # Convert to HTML
-        html_content = simple_markdown_to_html(markdown_content)
+        with profile_stage('markdown'):
+            html_content = simple_markdown_to_html(markdown_content)
         
         return {
             'title': frontmatter.get('title', ''),
@@ -814,7 +1085,78 @@ def parse_blog_post(file_path: Path) -> Optional[Dict[str, Any]]:
         print(f"Error parsing blog post {file_path}: {e}")
         return None
 
-def render_blog_index(section: Dict[str, Any], lang_data: Dict[str, str], lang: str, config: Dict[str, Any]) -> str:
+class BlogCorpus:
+    """Blog posts of every language, discovered and parsed once per build.
+    
+    The blog index, the post pages and the build manifest all read posts from
+    here. Parsed posts are kept in an on-disk cache keyed by file mtime and
+    size (and the generator version), so unchanged posts are never re-parsed.
+    """
+    
+    def __init__(self, directory: str = 'blog', cache_file: Optional[Path] = None):
+        self.directory = Path(directory)
+        self.cache_file = cache_file
+        self.cache: Dict[str, List[Any]] = {}
+        self._cache_dirty = False
+        self._generator = hash_bytes(GENERATOR_FILE.read_bytes())
+        if cache_file is not None:
+            try:
+                cached = load_json(str(cache_file))
+                if cached.get('generator') == self._generator:
+                    self.cache = cached.get('posts', {})
+            except (OSError, ValueError):
+                pass
+        self.refresh()
+    
+    def refresh(self) -> None:
+        """Forget discovered files so the next lookups see added or removed posts."""
+        self._files: Dict[str, List[Path]] = {}
+    
+    def files(self, lang: str) -> List[Path]:
+        """Markdown files of a language, sorted by name."""
+        files = self._files.get(lang)
+        if files is None:
+            lang_dir = self.directory / lang
+            files = self._files[lang] = sorted(lang_dir.glob('*.md')) if lang_dir.exists() else []
+        return files
+    
+    def get(self, file_path: Any) -> Optional[Dict[str, Any]]:
+        """Return the parsed post of a markdown file, or None if it cannot be parsed."""
+        key = Path(file_path).as_posix()
+        try:
+            stat = os.stat(key)
+        except OSError:
+            return None
+        entry = self.cache.get(key)
+        if entry and entry[0] == stat.st_mtime_ns and entry[1] == stat.st_size:
+            return entry[2]
+        post = parse_blog_post(Path(key))
+        if post:
+            self.cache[key] = [stat.st_mtime_ns, stat.st_size, post]
+            self._cache_dirty = True
+        return post
+    
+    def posts(self, lang: str) -> List[Dict[str, Any]]:
+        """Parsed posts of a language, newest (highest file name) first."""
+        return [post for post in (self.get(md_file) for md_file in reversed(self.files(lang))) if post]
+    
+    def load_all(self, languages: List[str]) -> None:
+        """Parse every post up front, e.g. before handing the corpus to worker processes."""
+        for lang in languages:
+            self.posts(lang)
+    
+    def save(self) -> None:
+        if self.cache_file is None or not self._cache_dirty:
+            return
+        # Drop entries of deleted posts
+        self.cache = {key: entry for key, entry in self.cache.items() if Path(key).exists()}
+        self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = self.cache_file.with_suffix('.tmp')
+        tmp_file.write_text(json.dumps({'generator': self._generator, 'posts': self.cache}), encoding='utf-8')
+        os.replace(tmp_file, self.cache_file)
+        self._cache_dirty = False
+
+def render_blog_index(section: Dict[str, Any], lang_data: Dict[str, str], lang: str, config: Dict[str, Any], blog: Optional[BlogCorpus] = None) -> str:
     """Render the blog index page with list of posts."""
     title = translate(section['title'], lang_data)
     subtitle = translate(section.get('subtitle', ''), lang_data)
@@ -824,15 +1166,10 @@ def render_blog_index(section: Dict[str, Any], lang_data: Dict[str, str], lang:
     is_first_content = section.get('is_first_content', False)
     first_class = ' first-content-section' if is_first_content else ''
     
-    # Load blog posts for this language
-    blog_dir = Path('blog') / lang
-    posts = []
-    
-    if blog_dir.exists():
-        for md_file in sorted(blog_dir.glob('*.md'), reverse=True):
-            post = parse_blog_post(md_file)
-            if post:
-                posts.append(post)
+    # Blog posts for this language
+    if blog is None:
+        blog = BlogCorpus()
+    posts = blog.posts(lang)
     
     # Generate post list HTML
     posts_html = ''
@@ -889,38 +1226,233 @@ def render_blog_post(post: Dict[str, Any], lang_data: Dict[str, str], config: Di
         </div>
     </section>'''
 
-def render_section(section: Dict[str, Any], lang_data: Dict[str, str], config: Dict[str, Any], lang: str) -> str:
+class CompiledTemplate:
+    """A page template parsed once into literal segments and named slots.
+    
+    Rendering is a single join instead of one full-page str.replace() per
+    placeholder. Placeholders the generator does not know, and leftover
+    '{{' / '}}' that do not form a valid placeholder, are reported when the
+    template is compiled.
+    """
+    
+    PLACEHOLDER = re.compile(r'\{\{([A-Z0-9_]+)\}\}')
+    
+    def __init__(self, source: str, slots: Tuple[str, ...], name: str = 'template.html'):
+        parts = self.PLACEHOLDER.split(source)
+        self.name = name
+        self.literals = parts[0::2]
+        self.slot_names = parts[1::2]
+        
+        unknown = sorted(set(self.slot_names) - set(slots))
+        if unknown:
+            raise ValueError(f"{name}: unknown placeholders {', '.join('{{%s}}' % slot for slot in unknown)}")
+        for literal in self.literals:
+            if '{{' in literal or '}}' in literal:
+                snippet = literal[literal.find('{{' if '{{' in literal else '}}'):][:40]
+                raise ValueError(f"{name}: malformed placeholder near {snippet!r}")
+    
+    def render(self, values: Dict[str, str]) -> str:
+        out = [self.literals[0]]
+        try:
+            for slot, literal in zip(self.slot_names, self.literals[1:]):
+                out.append(values[slot])
+                out.append(literal)
+        except KeyError as e:
+            raise ValueError(f"{self.name}: no value for placeholder {{{{{e.args[0]}}}}}") from None
+        return ''.join(out)
+
+# Placeholders filled by render_page_shell
+PAGE_TEMPLATE_SLOTS = (
+    'TITLE', 'META_DESCRIPTION', 'LANG', 'BASE_URL', 'STYLESHEET', 'FONT_STYLESHEET', 'SKIP_TO_CONTENT', 'NAV_HOME_LABEL',
+    'NAV_LOGO', 'NAV_TITLE', 'NAV_LINKS', 'LANG_SWITCHER', 'CONTENT', 'CONTACT_INFO_LABEL',
+    'CONTACT_PHONE', 'CONTACT_EMAIL', 'DEMO_URL', 'CALENDLY_URL', 'ONLINE_DEMO', 'BOOK_DEMO',
+    'PHONE', 'EMAIL', 'FOOTER_TEXT',
+)
+
+def load_template(path: str = 'template.html') -> CompiledTemplate:
+    return CompiledTemplate(Path(path).read_text(encoding='utf-8'), PAGE_TEMPLATE_SLOTS, name=path)
+
+class SectionType(NamedTuple):
+    """A registered section type: its renderer and what it reads besides the section itself."""
+    render: Callable[..., str]
+    # Top-level config.json keys the renderer reads
+    config_fields: Tuple[str, ...] = ()
+    # Files under assets/ the renderer reads, besides those referenced in the section
+    asset_files: Tuple[str, ...] = ()
+    # Whether the output may be memoized by the section cache; off for types that read other state
+    cacheable: bool = True
+
+# Section type name -> SectionType; filled by @section_type
+SECTION_TYPES: Dict[str, SectionType] = {}
+
+def section_type(name: str, config_fields: Tuple[str, ...] = (), asset_files: Tuple[str, ...] = (),
+                 cacheable: bool = True) -> Callable:
+    """Register the decorated function as the renderer of a section type.
+    
+    Renderers are called as render(section, lang_data, config, lang, blog)
+    and, unless cacheable is False, must only depend on those arguments,
+    the declared config fields and asset files and the assets the section
+    references. Registering a name again replaces its renderer, so section
+    plugins can override the built-in types as well as add their own.
+    """
+    def register(render: Callable[..., str]) -> Callable[..., str]:
+        SECTION_TYPES[name] = SectionType(render, tuple(config_fields), tuple(asset_files), cacheable)
+        return render
+    return register
+
+# Config keys that change how local images render (URLs, srcset, inlining)
+MEDIA_CONFIG_FIELDS = ('base_url', 'hash_asset_filenames', 'responsive_images', 'inline_assets')
+
+section_type('hero',
+             config_fields=('demo_url', 'calendly_url', 'languages', 'default_gradient', 'foam_svg', 'google_reviews_rating',
+                            'google_reviews_count', 'google_reviews_url') + MEDIA_CONFIG_FIELDS,
+             asset_files=('assets/foam.svg',),
+             )(lambda section, lang_data, config, lang, blog: render_hero(section, lang_data, config, lang))
+section_type('text', config_fields=MEDIA_CONFIG_FIELDS,
+             )(lambda section, lang_data, config, lang, blog: render_text_section(section, lang_data, lang, config))
+section_type('features_grid', config_fields=('default_gradient',) + MEDIA_CONFIG_FIELDS,
+             )(lambda section, lang_data, config, lang, blog: render_features_grid(section, lang_data, config))
+section_type('feature_categories', config_fields=('default_gradient',),
+             )(lambda section, lang_data, config, lang, blog: render_feature_categories(section, lang_data, config))
+section_type('testimonials',
+             )(lambda section, lang_data, config, lang, blog: render_testimonials(section, lang_data))
+section_type('google_reviews',
+             )(lambda section, lang_data, config, lang, blog: render_google_reviews(section, lang_data))
+section_type('faq',
+             )(lambda section, lang_data, config, lang, blog: render_faq(section, lang_data))
+section_type('contact', config_fields=('languages', 'contact_email'),
+             )(lambda section, lang_data, config, lang, blog: render_contact_form(section, lang_data, config, lang))
+section_type('cta', config_fields=('demo_url', 'calendly_url'),
+             )(lambda section, lang_data, config, lang, blog: render_cta_section(section, lang_data, config))
+# The blog index lists the posts of the BlogCorpus, which the section cache does not track
+section_type('blog_index', config_fields=('base_url',), cacheable=False,
+             )(lambda section, lang_data, config, lang, blog: render_blog_index(section, lang_data, lang, config, blog))
+
+# The part of section_cache_key shared by every language: (section, hash of the section and its
+# assets), keyed by the identity of the section's values, as generate_page renders a shallow copy
+# of the configured section per language. The copy keeps those values alive, so ids are not
+# reused. Reset by init_render_worker, as the assets change between builds.
+_SECTION_KEY_PARTS: Dict[Tuple[Tuple[str, int], ...], Tuple[Dict[str, Any], str]] = {}
+
+def section_cache_key(registered: SectionType, section: Dict[str, Any], config: Dict[str, Any], lang: str) -> str:
+    """Hash of everything a section's output depends on besides translations."""
+    identity = tuple((key, id(value)) for key, value in section.items())
+    part = _SECTION_KEY_PARTS.get(identity)
+    if part is None:
+        assets = current_assets()
+        asset_state = {}
+        for path in sorted(set(collect_asset_refs(section)) | set(registered.asset_files)):
+            info = assets.get(path)
+            asset_state[path] = [info.hash if info else None, [d.path for d in assets.derivatives.get(path, [])]]
+        part = _SECTION_KEY_PARTS[identity] = (section, hash_json([section, asset_state]))
+    return hash_json([part[1], lang, {field: config.get(field) for field in registered.config_fields}])
+
+class SectionCache:
+    """Rendered sections, reused within a build and across builds.
+    
+    Entries are keyed by section_cache_key and keep the translation values
+    the renderer read; an entry is reused only while those values are
+    unchanged, so repeated and unchanged sections cost a hash and a lookup.
+    The on-disk copy is dropped when generate.py or a section plugin changes.
+    """
+    
+    def __init__(self, cache_file: Optional[Path] = None, version: str = '', load: bool = True):
+        self.cache_file = cache_file
+        self.version = version
+        # key -> [translation reads, html]
+        self.entries: Dict[str, List[Any]] = {}
+        self.used: Set[str] = set()
+        self._new: Dict[str, List[Any]] = {}
+        if cache_file is not None and load:
+            try:
+                cached = load_json(str(cache_file))
+                if cached.get('version') == version:
+                    self.entries = cached.get('sections', {})
+            except (OSError, ValueError):
+                pass
+    
+    def render(self, registered: SectionType, section: Dict[str, Any], lang_data: Dict[str, str], config: Dict[str, Any],
+               lang: str, blog: Optional[BlogCorpus]) -> str:
+        key = section_cache_key(registered, section, config, lang)
+        self.used.add(key)
+        entry = self.entries.get(key)
+        if entry is not None and all(lang_data.get(k) == value for k, value in entry[0].items()):
+            return entry[1]
+        recording = RecordingTranslations(lang_data)
+        html = registered.render(section, recording, config, lang, blog)
+        self.entries[key] = self._new[key] = [recording.reads, html]
+        return html
+    
+    def drain(self) -> Tuple[Dict[str, List[Any]], Set[str]]:
+        """Return and reset the entries added and keys used, to ship them from a worker to the main process."""
+        data = (self._new, self.used)
+        self._new = {}
+        self.used = set()
+        return data
+    
+    def merge(self, data: Tuple[Dict[str, List[Any]], Set[str]]) -> None:
+        new, used = data
+        self.entries.update(new)
+        self._new.update(new)
+        self.used.update(used)
+    
+    def save(self, prune: bool = False) -> None:
+        """Write the cache; with prune, keep only the entries used since the last save (after a full build)."""
+        if self.cache_file is None:
+            return
+        stale = self.entries.keys() - self.used if prune else set()
+        for key in stale:
+            del self.entries[key]
+        if self._new or stale:
+            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_file = self.cache_file.with_suffix('.tmp')
+            tmp_file.write_text(json.dumps({'version': self.version, 'sections': self.entries}), encoding='utf-8')
+            os.replace(tmp_file, self.cache_file)
+        self._new = {}
+        self.used = set()
+
+# Section cache of the running build; set by init_render_worker, None renders every section
+SECTION_CACHE: Optional[SectionCache] = None
+
+# Plugin paths already imported by this process
+_LOADED_SECTION_PLUGINS: Set[str] = set()
+
+def load_section_plugins(config: Dict[str, Any]) -> None:
+    """Import the Python files listed in 'section_plugins', which register section types with @section_type.
+    
+    Plugins import this module as 'generate', also when it runs as a script.
+    """
+    for plugin in config.get('section_plugins', []):
+        if plugin in _LOADED_SECTION_PLUGINS:
+            continue
+        if not Path(plugin).is_file():
+            raise ValueError(f"Section plugin not found: {plugin}")
+        sys.modules.setdefault('generate', sys.modules[__name__])
+        spec = importlib.util.spec_from_file_location(f'section_plugin_{Path(plugin).stem}', plugin)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        _LOADED_SECTION_PLUGINS.add(plugin)
+
+def render_section(section: Dict[str, Any], lang_data: Dict[str, str], config: Dict[str, Any], lang: str, blog: Optional[BlogCorpus] = None) -> str:
     if not section.get('enabled', True):
         return ""
     
-    section_type = section['type']
-    
-    if section_type == 'hero':
-        return render_hero(section, lang_data, config, lang)
-    elif section_type == 'text':
-        return render_text_section(section, lang_data, lang, config)
-    elif section_type == 'features_grid':
-        return render_features_grid(section, lang_data, config)
-    elif section_type == 'feature_categories':
-        return render_feature_categories(section, lang_data, config)
-    elif section_type == 'testimonials':
-        return render_testimonials(section, lang_data)
-    elif section_type == 'google_reviews':
-        return render_google_reviews(section, lang_data)
-    elif section_type == 'faq':
-        return render_faq(section, lang_data)
-    elif section_type == 'contact':
-        return render_contact_form(section, lang_data, config, lang)
-    elif section_type == 'cta':
-        return render_cta_section(section, lang_data, config)
-    elif section_type == 'blog_index':
-        return render_blog_index(section, lang_data, lang, config)
-    
-    return ""
-
-def generate_page(page: Dict[str, Any], config: Dict[str, Any], lang: str, template: str) -> str:
-    lang_data = load_json(f"translations/{lang}.json")
-    base_url = config.get('base_url', '')
+    with profile_stage(f"section:{section['type']}"):
+        return _render_section(section, lang_data, config, lang, blog)
+
+def _render_section(section: Dict[str, Any], lang_data: Dict[str, str], config: Dict[str, Any], lang: str, blog: Optional[BlogCorpus]) -> str:
+    registered = SECTION_TYPES.get(section['type'])
+    if registered is None:
+        return ""
+    if SECTION_CACHE is None or not registered.cacheable:
+        return registered.render(section, lang_data, config, lang, blog)
+    return SECTION_CACHE.render(registered, section, lang_data, config, lang, blog)
+
+def generate_page(page: Dict[str, Any], config: Dict[str, Any], lang: str, template: CompiledTemplate, lang_data: Optional[Dict[str, str]] = None, chrome: Optional[PageChrome] = None, blog: Optional[BlogCorpus] = None) -> str:
+    if lang_data is None:
+        lang_data = TranslationStore([lang]).get(lang)
+    if chrome is None:
+        chrome = PageChrome(config)
     
     # Check if first section has gradient to determine logo color
     has_gradient = False
@@ -931,6 +1463,7 @@ def generate_page(page: Dict[str, Any], config: Dict[str, Any], lang: str, templ
     
     sections_html = []
     first_non_hero_found = False
+    above_fold = None
     
     for idx, section in enumerate(page.get('sections', [])):
         # Clone section dict to avoid modifying original
@@ -943,114 +1476,1305 @@ def generate_page(page: Dict[str, Any], config: Dict[str, Any], lang: str, templ
             
             # Do NOT add gradient automatically - let sections specify their own backgrounds
         
-        sections_html.append(render_section(section, lang_data, config, lang))
-    
-    nav_html = render_nav(config, lang_data, page['slug'], lang)
-    lang_switcher_html = render_lang_switcher(config, page['slug'], lang)
-    nav_logo_html = render_nav_logo(config, lang_data, has_gradient)
+        sections_html.append(render_section(section, lang_data, config, lang, blog))
+        if above_fold is None and sections_html[-1]:
+            # The hero, or the first content section when there is none
+            above_fold = '\n'.join(sections_html)
+    
+    return render_page_shell(template, chrome, config, lang, lang_data, page['slug'], has_gradient,
+                             title=translate('site_title', lang_data),
+                             meta_description=translate('site_description', lang_data),
+                             content='\n'.join(sections_html), above_fold=above_fold)
+
+def render_blog_post_page(post: Dict[str, Any], config: Dict[str, Any], lang: str, template: CompiledTemplate, lang_data: Optional[Dict[str, str]] = None, chrome: Optional[PageChrome] = None) -> str:
+    """Render a complete page for a single blog post."""
+    if lang_data is None:
+        lang_data = TranslationStore([lang]).get(lang)
+    if chrome is None:
+        chrome = PageChrome(config)
+    
+    return render_page_shell(template, chrome, config, lang, lang_data, 'blog', False,
+                             title=f"{post['title']} - {translate('site_title', lang_data)}",
+                             meta_description=post['excerpt'],
+                             content=render_blog_post(post, lang_data, config, lang))
+
+def render_page_shell(template: CompiledTemplate, chrome: PageChrome, config: Dict[str, Any], lang: str, lang_data: Dict[str, str],
+                      current_page: str, has_gradient: bool, title: str, meta_description: str, content: str,
+                      above_fold: Optional[str] = None) -> str:
+    """Fill the page template around already rendered content; shared by pages and blog posts.
+    
+    With critical_css, above_fold is the leading part of content whose CSS is
+    inlined (all of content when None).
+    """
+    stylesheet_url = asset_url(f'/{STYLESHEET}', config.get('base_url', ''))
+    defer_styles = config.get('critical_css', False)
+    fonts_url = config.get('fonts_url', '')
+    if not fonts_url:
+        font_stylesheet = ''
+    elif defer_styles:
+        font_stylesheet = stylesheet_link(fonts_url, defer=True)
+    else:
+        font_stylesheet = f'<link href="{fonts_url}" rel="stylesheet">'
+    html = template.render({
+        'TITLE': title,
+        'META_DESCRIPTION': meta_description,
+        'LANG': lang,
+        'BASE_URL': config.get('base_url', ''),
+        'STYLESHEET': CRITICAL_CSS_MARKER if defer_styles else stylesheet_link(stylesheet_url),
+        'FONT_STYLESHEET': font_stylesheet,
+        'SKIP_TO_CONTENT': translate('skip_to_content', lang_data),
+        'NAV_HOME_LABEL': translate('nav_home_label', lang_data),
+        'NAV_LOGO': chrome.logo(lang, lang_data, has_gradient),
+        'NAV_TITLE': translate('site_brand', lang_data),
+        'NAV_LINKS': chrome.nav(lang, lang_data, current_page),
+        'LANG_SWITCHER': chrome.lang_switcher(lang, current_page),
+        'CONTENT': content,
+        'CONTACT_INFO_LABEL': translate('contact_info_label', lang_data),
+        'CONTACT_PHONE': translate('contact_phone', lang_data),
+        'CONTACT_EMAIL': translate('contact_email', lang_data),
+        'DEMO_URL': config.get('demo_url', ''),
+        'CALENDLY_URL': config.get('calendly_url', ''),
+        'ONLINE_DEMO': translate('online_demo', lang_data),
+        'BOOK_DEMO': translate('book_demo', lang_data),
+        'PHONE': config['languages'][lang].get('phone', ''),
+        'EMAIL': config.get('contact_email', ''),
+        'FOOTER_TEXT': translate('footer_text', lang_data),
+    })
+    if defer_styles:
+        html = inline_critical_css(html, content, above_fold, stylesheet_url)
+    return html
+
+# Elements whose content is kept verbatim by minify_html
+HTML_TOKEN = re.compile(r"""
+    (?P<raw><(?P<raw_tag>pre|script|style|textarea)\b(?:[^>"']+|"[^"]*"|'[^']*')*>.*?</(?P=raw_tag)\s*>)
+  | (?P<comment><!--(?!\[if).*?-->)
+  | (?P<tag><(?P<close>/?)(?P<name>[a-zA-Z!][\w-]*)(?:[^>"']+|"[^"]*"|'[^']*')*>)
+  | (?P<text>[^<]+|<)
+""", re.DOTALL | re.IGNORECASE | re.VERBOSE)
+HTML_SPACE = re.compile(r'\s+')
+# Quoted attribute values that can go unquoted; a trailing '/' is kept quoted
+# so it cannot be mistaken for a self-closing slash
+HTML_QUOTED_ATTR = re.compile(r'(\s[\w:.-]+=)"([^\s"\'=<>`]*[^\s"\'=<>`/])"')
+# Elements next to which whitespace never renders
+HTML_BLOCK_TAGS = frozenset((
+    '!doctype', 'html', 'head', 'body', 'title', 'meta', 'link', 'base', 'div', 'section', 'nav', 'header',
+    'footer', 'main', 'article', 'aside', 'p', 'ul', 'ol', 'li', 'dl', 'dt', 'dd', 'h1', 'h2', 'h3', 'h4',
+    'h5', 'h6', 'form', 'fieldset', 'table', 'thead', 'tbody', 'tfoot', 'tr', 'td', 'th', 'blockquote',
+    'figure', 'figcaption', 'hr', 'br', 'details', 'summary', 'address',
+))
+
+def _unquote_attr(match: re.Match) -> str:
+    # A function replacement avoids re's template expansion on every attribute
+    return match.group(1) + match.group(2)
+
+def minify_html(html: str) -> str:
+    """Collapse insignificant whitespace, drop comments and unquote simple attribute values.
+    
+    A single scan over the page: <pre>, <script>, <style> and <textarea>
+    are copied verbatim, whitespace runs in text become one space, and
+    whitespace next to block-level tags is dropped.
+    """
+    out = []
+    pending_space = False
+    after_block = True
+    for match in HTML_TOKEN.finditer(html):
+        kind = match.lastgroup
+        if kind == 'comment':
+            continue
+        token = match.group(0)
+        is_block = False
+        if kind == 'text':
+            if token[0].isspace():
+                pending_space = True
+            token = HTML_SPACE.sub(' ', token).strip()
+            if not token:
+                continue
+        elif kind == 'tag':
+            token = HTML_QUOTED_ATTR.sub(_unquote_attr, token)
+            is_block = match.group('name').lower() in HTML_BLOCK_TAGS
+        if pending_space and not is_block and not after_block:
+            out.append(' ')
+        out.append(token)
+        after_block = is_block
+        # Trailing whitespace of a text run is pending until the next token
+        pending_space = kind == 'text' and match.group(0)[-1].isspace()
+    return ''.join(out)
+
+# Classes added at runtime by inline scripts (the FAQ toggle), never present in the rendered HTML
+CSS_SAFELIST = ('active',)
+# At-rules whose block holds ordinary rules that can be pruned; other at-rules are kept whole
+CSS_GROUPING_RULES = ('@media', '@supports', '@layer', '@container')
+CSS_COMMENT = re.compile(r'/\*.*?\*/', re.DOTALL)
+CSS_BLOCK_TOKEN = re.compile(r'''[{}]|"(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*\'''')
+# Parts of a selector that never require anything in the page: attribute
+# selectors, strings and pseudo-classes/elements (with their arguments, so
+# :not(.x) does not require .x)
+CSS_SELECTOR_IGNORED = re.compile(r'''\[[^\]]*\]|"[^"]*"|'[^']*'|::?[\w-]+(?:\([^)]*\))?''')
+CSS_SELECTOR_TOKEN = re.compile(r'[.#][\w-]+|(?:^|(?<=[\s>+~]))[a-zA-Z][\w-]*')
+HTML_SELECTOR_ATTR = re.compile(r'''\s(class|id)=(?:"([^"]*)"|'([^']*)'|([^\s"'=<>`]+))''')
+HTML_TAG_NAME = re.compile(r'<([a-zA-Z][\w-]*)')
+
+def page_selectors(html: str) -> List[str]:
+    """Return the tag names, '.classes' and '#ids' used in a page."""
+    tokens = {name.lower() for name in HTML_TAG_NAME.findall(html)}
+    for attr, double_quoted, single_quoted, bare in HTML_SELECTOR_ATTR.findall(html):
+        value = double_quoted or single_quoted or bare
+        if attr == 'class':
+            tokens.update(f'.{name}' for name in value.split())
+        elif value.strip():
+            tokens.add(f'#{value.strip()}')
+    return sorted(tokens)
+
+def selector_can_match(selector: str, used: Set[str]) -> bool:
+    """Check that every tag, class and id a selector requires occurs in the pages."""
+    for token in CSS_SELECTOR_TOKEN.findall(CSS_SELECTOR_IGNORED.sub('', selector)):
+        if token[0] not in '.#':
+            token = token.lower()
+        if token not in used:
+            return False
+    return True
+
+def split_selectors(prelude: str) -> List[str]:
+    """Split a selector list on the commas that are not inside parentheses or brackets."""
+    selectors = []
+    depth = 0
+    start = 0
+    for i, char in enumerate(prelude):
+        if char in '([':
+            depth += 1
+        elif char in ')]':
+            depth -= 1
+        elif char == ',' and depth == 0:
+            selectors.append(prelude[start:i].strip())
+            start = i + 1
+    selectors.append(prelude[start:].strip())
+    return [selector for selector in selectors if selector]
+
+def _prune_css_block(css: str, used: Set[str]) -> str:
+    rules = []
+    pos = 0
+    depth = 0
+    brace = 0
+    for match in CSS_BLOCK_TOKEN.finditer(css):
+        token = match.group(0)
+        if token == '{':
+            if depth == 0:
+                brace = match.start()
+            depth += 1
+        elif token == '}':
+            depth -= 1
+            if depth:
+                continue
+            prelude = css[pos:brace].strip()
+            body = css[brace + 1:match.start()]
+            pos = match.end()
+            # Statements such as @import or @charset end with ';' before the next rule
+            statements, _, prelude = prelude.rpartition(';')
+            if statements:
+                rules.append(statements + ';')
+            if prelude.startswith('@'):
+                if prelude.lower().startswith(CSS_GROUPING_RULES):
+                    inner = _prune_css_block(body, used)
+                    if inner:
+                        rules.append(f'{prelude} {{\n{inner}\n}}')
+                else:
+                    rules.append(f'{prelude} {{{body}}}')
+                continue
+            selectors = split_selectors(prelude)
+            kept = [selector for selector in selectors if selector_can_match(selector, used)]
+            if len(kept) == len(selectors):
+                rules.append(f'{prelude} {{{body}}}')
+            elif kept:
+                selector_list = ',\n'.join(kept)
+                rules.append(f'{selector_list} {{{body}}}')
+    trailing = css[pos:].strip()
+    if trailing:
+        rules.append(trailing)
+    return '\n\n'.join(rules)
+
+def prune_css(css: str, used: Set[str]) -> str:
+    """Drop the rules of a stylesheet whose selectors cannot match any page.
+    
+    used holds the tag names, '.classes' and '#ids' of every page (see
+    page_selectors). Selectors in a list are pruned individually; grouping
+    at-rules are pruned recursively and dropped when empty.
+    """
+    return _prune_css_block(CSS_COMMENT.sub('', css), used) + '\n'
+
+def css_safelist(config: Dict[str, Any]) -> Set[str]:
+    """Classes (or '#ids') kept regardless of the pages: CSS_SAFELIST plus config 'css_safelist'."""
+    names = list(CSS_SAFELIST) + list(config.get('css_safelist', []))
+    return {name if name[0] in '.#' else f'.{name}' for name in names if name}
+
+CRITICAL_CSS_MARKER = '<!--critical-css-->'
+# (stylesheet hash, selectors above the fold that occur in the stylesheet) ->
+# inlined CSS; pages with the same first section and chrome share an entry
+_CRITICAL_CSS_CACHE: Dict[Tuple[str, frozenset], str] = {}
+# stylesheet hash -> (source, every word, '.class' and '#id' it mentions)
+_STYLESHEET_SOURCES: Dict[str, Tuple[str, Set[str]]] = {}
+CSS_WORD = re.compile(r'[.#]?[\w-]+')
+CSS_SPACE = re.compile(r'\s+')
+CSS_PUNCTUATION_SPACE = re.compile(r'\s*([{};,>])\s*')
+
+def stylesheet_link(url: str, defer: bool = False) -> str:
+    """Return a <link> for a stylesheet; deferred ones load without blocking rendering."""
+    if not defer:
+        return f'<link rel="stylesheet" href="{url}">'
+    return (f'<link rel="preload" href="{url}" as="style" onload="this.onload=null;this.rel=\'stylesheet\'">'
+            f'<noscript><link rel="stylesheet" href="{url}"></noscript>')
+
+def critical_css(selectors: List[str]) -> str:
+    """Return the rules of styles.css that can match the given selectors, compacted for a <style> tag."""
+    info = current_assets().get(STYLESHEET)
+    if info is None:
+        return ''
+    if info.hash not in _STYLESHEET_SOURCES:
+        source = Path(STYLESHEET).read_text(encoding='utf-8')
+        _STYLESHEET_SOURCES[info.hash] = (source, set(CSS_WORD.findall(source.lower())))
+    source, words = _STYLESHEET_SOURCES[info.hash]
+    # Ids and classes the stylesheet never mentions cannot change the result
+    key = (info.hash, frozenset(selector for selector in selectors if selector.lower() in words))
+    css = _CRITICAL_CSS_CACHE.get(key)
+    if css is None:
+        with profile_stage('critical css'):
+            css = prune_css(source, set(selectors))
+            css = CSS_PUNCTUATION_SPACE.sub(r'\1', CSS_SPACE.sub(' ', css)).strip()
+        css = _CRITICAL_CSS_CACHE[key] = css
+    return css
+
+def inline_critical_css(html: str, content: str, above_fold: Optional[str], stylesheet_url: str) -> str:
+    """Replace the stylesheet marker with the CSS the page needs above the fold and a deferred full stylesheet.
+    
+    Everything outside <main> counts as above the fold (the navbar, and the
+    fixed contact box), plus the start of content given by above_fold.
+    """
+    visible = html
+    if above_fold is not None:
+        start = html.find(content)
+        if start >= 0:
+            visible = html[:start + len(above_fold)] + html[start + len(content):]
+    styles = f'<style>{critical_css(page_selectors(visible))}</style>{stylesheet_link(stylesheet_url, defer=True)}'
+    return html.replace(CRITICAL_CSS_MARKER, styles, 1)
+
+def page_output_path(page: Dict[str, Any], lang: str) -> str:
+    """Return the output path of a page, relative to dist/."""
+    if page['slug'] == 'home':
+        return f"{lang}/index.html"
+    return f"{lang}/{page['slug']}.html"
+
+def job_output_path(job: Tuple[str, str, Any], config: Dict[str, Any]) -> str:
+    """Return the output path of a render job, relative to dist/."""
+    kind, lang, target = job
+    if kind == 'page':
+        return page_output_path(config['pages'][target], lang)
+    # Blog post slugs are the markdown file stem (see parse_blog_post)
+    return f"{lang}/blog/{Path(target).stem}.html"
+
+GENERATOR_FILE = Path(__file__)
+BUILD_CACHE_DIR = Path('.build-cache')
+MANIFEST_FILE = BUILD_CACHE_DIR / 'manifest.json'
+# Output tree and manifest of the serve command, which leaves dist/ alone
+PREVIEW_DIR = BUILD_CACHE_DIR / 'preview'
+PREVIEW_MANIFEST_FILE = BUILD_CACHE_DIR / 'preview-manifest.json'
+BLOG_CACHE_FILE = BUILD_CACHE_DIR / 'blog.json'
+SECTION_CACHE_FILE = BUILD_CACHE_DIR / 'sections.json'
+IMAGE_SIZE_CACHE_FILE = BUILD_CACHE_DIR / 'image-sizes.json'
+IMAGE_DERIVATIVE_DIR = BUILD_CACHE_DIR / 'images'
+MANIFEST_VERSION = 1
+LOGO_FILES = ('assets/logo-dark.svg', 'assets/logo-light.svg')
+STYLESHEET = 'assets/styles.css'
+FOAM_SVG = 'assets/foam.svg'
+STATIC_ASSETS = (STYLESHEET,)
+
+def hash_bytes(data: bytes) -> str:
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+def hash_json(data: Any) -> str:
+    return hash_bytes(json.dumps(data, sort_keys=True, ensure_ascii=False).encode('utf-8'))
+
+class FileHasher:
+    """Content hashes of source files.
+    
+    Hashes are memoized for the duration of a build and carried over between
+    builds keyed by (mtime, size), so unchanged files are never re-read.
+    """
+    
+    def __init__(self, known: Optional[Dict[str, List[Any]]] = None):
+        self.known = known or {}
+        self.files: Dict[str, List[Any]] = {}
+        # Paths found missing during this build; not carried over, they may appear later
+        self.missing: Set[str] = set()
+    
+    def hash(self, path: Any, stat: Optional[os.stat_result] = None) -> str:
+        # Most calls pass a posix path string seen before; skip building a Path for those
+        if isinstance(path, str):
+            entry = self.files.get(path)
+            if entry is not None:
+                return entry[2]
+            if path in self.missing:
+                return 'missing'
+        key = Path(path).as_posix()
+        entry = self.files.get(key)
+        if entry is not None:
+            return entry[2]
+        if key in self.missing:
+            return 'missing'
+        if stat is None:
+            try:
+                stat = os.stat(key)
+            except OSError:
+                self.missing.add(key)
+                return 'missing'
+        previous = self.known.get(key)
+        if previous and previous[0] == stat.st_mtime_ns and previous[1] == stat.st_size:
+            digest = previous[2]
+        else:
+            digest = hash_bytes(Path(key).read_bytes())
+        self.files[key] = [stat.st_mtime_ns, stat.st_size, digest]
+        return digest
     
-    phone = config['languages'][lang].get('phone', '')
-    email = config.get('contact_email', '')
+    def next_build(self) -> 'FileHasher':
+        """A hasher for the next build that still knows every hash loaded or taken so far."""
+        return FileHasher({**self.known, **self.files})
+
+SVG_ROOT = re.compile(rb'<svg\b[^>]*>', re.S)
+SVG_LENGTH = re.compile(r'\s*([0-9]*\.?[0-9]+)\s*(?:px)?\s*$')
+
+def _svg_attribute(tag: str, name: str) -> Optional[str]:
+    match = re.search(rf'\s{name}\s*=\s*["\']([^"\']*)["\']', tag)
+    return match.group(1) if match else None
+
+def _probe_svg(head: bytes) -> Optional[Tuple[int, int]]:
+    root = SVG_ROOT.search(head)
+    if not root:
+        return None
+    tag = root.group(0).decode('utf-8', 'replace')
+    width = SVG_LENGTH.match(_svg_attribute(tag, 'width') or '')
+    height = SVG_LENGTH.match(_svg_attribute(tag, 'height') or '')
+    if width and height:
+        return round(float(width.group(1))), round(float(height.group(1)))
+    # Percentages and other units: fall back to the viewBox
+    view_box = (_svg_attribute(tag, 'viewBox') or '').replace(',', ' ').split()
+    if len(view_box) == 4:
+        try:
+            return round(float(view_box[2])), round(float(view_box[3]))
+        except ValueError:
+            return None
+    return None
+
+def _probe_jpeg(f) -> Optional[Tuple[int, int]]:
+    f.seek(2)
+    while True:
+        marker = f.read(2)
+        if len(marker) < 2 or marker[0] != 0xFF:
+            return None
+        # Fill bytes before a marker
+        while marker[1] == 0xFF:
+            marker = marker[1:] + f.read(1)
+            if len(marker) < 2:
+                return None
+        code = marker[1]
+        if code in (0xD8, 0x01) or 0xD0 <= code <= 0xD7:
+            continue
+        length_bytes = f.read(2)
+        if len(length_bytes) < 2:
+            return None
+        length = int.from_bytes(length_bytes, 'big')
+        # SOF0-SOF15, except DHT (C4), JPG (C8) and DAC (CC)
+        if 0xC0 <= code <= 0xCF and code not in (0xC4, 0xC8, 0xCC):
+            frame = f.read(5)
+            if len(frame) < 5:
+                return None
+            return int.from_bytes(frame[3:5], 'big'), int.from_bytes(frame[1:3], 'big')
+        f.seek(length - 2, os.SEEK_CUR)
+
+def probe_image_size(path: Any) -> Optional[Tuple[int, int]]:
+    """Read (width, height) from a PNG, JPEG, GIF, WebP or SVG header without decoding pixels.
     
-    page_html = template.replace('{{TITLE}}', translate('site_title', lang_data))
-    page_html = page_html.replace('{{META_DESCRIPTION}}', translate('site_description', lang_data))
-    page_html = page_html.replace('{{LANG}}', lang)
-    page_html = page_html.replace('{{BASE_URL}}', base_url)
-    page_html = page_html.replace('{{SKIP_TO_CONTENT}}', translate('skip_to_content', lang_data))
-    page_html = page_html.replace('{{NAV_HOME_LABEL}}', translate('nav_home_label', lang_data))
-    page_html = page_html.replace('{{NAV_LOGO}}', nav_logo_html)
-    page_html = page_html.replace('{{NAV_TITLE}}', translate('site_brand', lang_data))
-    page_html = page_html.replace('{{NAV_LINKS}}', nav_html)
-    page_html = page_html.replace('{{LANG_SWITCHER}}', lang_switcher_html)
-    page_html = page_html.replace('{{CONTENT}}', '\n'.join(sections_html))
-    page_html = page_html.replace('{{CONTACT_INFO_LABEL}}', translate('contact_info_label', lang_data))
-    page_html = page_html.replace('{{CONTACT_PHONE}}', translate('contact_phone', lang_data))
-    page_html = page_html.replace('{{CONTACT_EMAIL}}', translate('contact_email', lang_data))
-    page_html = page_html.replace('{{DEMO_URL}}', config.get('demo_url', ''))
-    page_html = page_html.replace('{{CALENDLY_URL}}', config.get('calendly_url', ''))
-    page_html = page_html.replace('{{ONLINE_DEMO}}', translate('online_demo', lang_data))
-    page_html = page_html.replace('{{BOOK_DEMO}}', translate('book_demo', lang_data))
-    page_html = page_html.replace('{{PHONE}}', phone)
-    page_html = page_html.replace('{{EMAIL}}', email)
-    page_html = page_html.replace('{{FOOTER_TEXT}}', translate('footer_text', lang_data))
-    
-    return page_html
-
-def main():
-    config = load_json('config.json')
-    template = Path('template.html').read_text(encoding='utf-8')
-    
-    dist = Path('dist')
-    if dist.exists():
-        shutil.rmtree(dist)
-    dist.mkdir()
-    
-    (dist / 'assets').mkdir()
-    shutil.copy('assets/styles.css', dist / 'assets' / 'styles.css')
-    
-    # Copy foam.svg if it exists
-    foam_svg = Path('assets/foam.svg')
-    if foam_svg.exists():
-        shutil.copy(foam_svg, dist / 'assets' / 'foam.svg')
+    Returns None for other formats and for files that cannot be parsed.
+    """
+    try:
+        with open(path, 'rb') as f:
+            head = f.read(4096)
+            if head.startswith(b'\x89PNG\r\n\x1a\n') and head[12:16] == b'IHDR':
+                return int.from_bytes(head[16:20], 'big'), int.from_bytes(head[20:24], 'big')
+            if head[:6] in (b'GIF87a', b'GIF89a'):
+                return int.from_bytes(head[6:8], 'little'), int.from_bytes(head[8:10], 'little')
+            if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+                chunk = head[12:16]
+                if chunk == b'VP8 ' and len(head) >= 30:
+                    return int.from_bytes(head[26:28], 'little') & 0x3FFF, int.from_bytes(head[28:30], 'little') & 0x3FFF
+                if chunk == b'VP8L' and len(head) >= 25:
+                    bits = int.from_bytes(head[21:25], 'little')
+                    return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+                if chunk == b'VP8X' and len(head) >= 30:
+                    return int.from_bytes(head[24:27], 'little') + 1, int.from_bytes(head[27:30], 'little') + 1
+                return None
+            if head[:2] == b'\xff\xd8':
+                return _probe_jpeg(f)
+            if b'<svg' in head:
+                if b'>' not in head[head.index(b'<svg'):]:
+                    head += f.read(65536)
+                return _probe_svg(head)
+    except (OSError, ValueError):
+        return None
+    return None
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.gif', '.webp', '.svg')
+
+class AssetInfo(NamedTuple):
+    path: str
+    size: int
+    mtime_ns: int
+    hash: str
+    dimensions: Optional[Tuple[int, int]]
+
+def asset_path(ref: str) -> str:
+    """Normalize an asset reference from config ('/assets/x.jpg', 'x.jpg') to its path under assets/."""
+    path = ref.lstrip('/')
+    return path if path.startswith('assets/') else f'assets/{path}'
+
+INLINE_ASSET_DEFAULTS = {
+    # Assets up to this many bytes are inlined into the page, larger ones are served as files
+    'max_bytes': 4096,
+    # Small SVGs where markup can go: 'data_uri' (in an <img>) or 'markup' (an inline <svg>)
+    'svg': 'data_uri',
+}
+DATA_URI_TYPES = {
+    '.svg': 'image/svg+xml',
+    '.png': 'image/png',
+    '.gif': 'image/gif',
+    '.jpg': 'image/jpeg',
+    '.jpeg': 'image/jpeg',
+    '.webp': 'image/webp',
+}
+
+def inline_asset_settings(config: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Return the 'inline_assets' config merged over the defaults, or None when inlining is off."""
+    settings = config.get('inline_assets', {})
+    if settings is False:
+        return None
+    return {**INLINE_ASSET_DEFAULTS, **settings}
+
+def encode_inline_asset(path: str, mime: str, markup: bool) -> str:
+    """Return an asset as inline SVG markup (starting at its root <svg>) or as a data URI."""
+    data = Path(path).read_bytes()
+    if mime != 'image/svg+xml':
+        return f"data:{mime};base64,{base64.b64encode(data).decode('ascii')}"
+    root = SVG_ROOT.search(data)
+    # Drop the XML declaration, doctype and comments before the root element
+    text = data[root.start() if root else 0:].decode('utf-8').strip()
+    if markup and root:
+        return text
+    # Percent-encoded SVG is smaller than base64 and compresses better
+    return f"data:{mime},{quote(text, safe=' !$&()*+,/:;=?@[]~')}"
+
+class AssetManifest:
+    """Every file under assets/ with size, mtime and content hash, from a single scan per build.
+    
+    Renderers query it instead of stat'ing files themselves; content hashes
+    come from the FileHasher, so unchanged files are not re-read. With
+    hash_names, assets are published as name.<hash>.ext. Image
+    dimensions are probed from file headers and cached by content hash in
+    .build-cache/image-sizes.json. The inline settings decide which assets
+    renderers embed into pages instead of referencing them.
+    """
+    
+    def __init__(self, hasher: Optional[FileHasher] = None, directory: str = 'assets', size_cache: Optional[Path] = None,
+                 hash_names: bool = False, inline: Optional[Dict[str, Any]] = INLINE_ASSET_DEFAULTS):
+        self.directory = directory
+        self.hash_names = hash_names
+        self.inline = inline
+        # (path, markup allowed) -> inline form, or None for an external file
+        self._inlined: Dict[Tuple[str, bool], Optional[str]] = {}
+        self.size_cache = size_cache
+        self.assets: Dict[str, AssetInfo] = {}
+        self._known_sizes: Dict[str, Any] = {}
+        if size_cache is not None and size_cache.exists():
+            try:
+                self._known_sizes = load_json(size_cache)
+            except (OSError, ValueError):
+                pass
+        self._probed = 0
+        self._scan(directory, hasher or FileHasher())
+        # Published hashes that differ from the source hash (the pruned stylesheet)
+        self.hash_overrides: Dict[str, str] = {}
+        # Filled in by build_image_derivatives
+        self.derivatives: Dict[str, List['ImageDerivative']] = {}
+        self.responsive: Optional[Dict[str, Any]] = None
+    
+    def _scan(self, directory: str, hasher: FileHasher) -> None:
+        try:
+            entries = list(os.scandir(directory))
+        except OSError:
+            return
+        for entry in entries:
+            path = f'{directory}/{entry.name}'
+            if entry.is_dir():
+                self._scan(path, hasher)
+            elif entry.is_file():
+                stat = entry.stat()
+                digest = hasher.hash(path, stat)
+                dimensions = None
+                if entry.name.lower().endswith(IMAGE_EXTENSIONS):
+                    if digest in self._known_sizes:
+                        dimensions = self._known_sizes[digest]
+                    else:
+                        dimensions = probe_image_size(path)
+                        self._probed += 1
+                    dimensions = tuple(dimensions) if dimensions else None
+                self.assets[path] = AssetInfo(path, stat.st_size, stat.st_mtime_ns, digest, dimensions)
+    
+    def get(self, ref: str) -> Optional[AssetInfo]:
+        return self.assets.get(asset_path(ref))
+    
+    def exists(self, ref: str) -> bool:
+        return asset_path(ref) in self.assets
+    
+    def published_path(self, ref: str) -> str:
+        """Path of an asset in dist/: name.<hash>.ext when filenames are content-hashed."""
+        path = asset_path(ref)
+        info = self.assets.get(path)
+        if not self.hash_names or info is None:
+            return path
+        digest = self.hash_overrides.get(path, info.hash)
+        posix_path = PurePosixPath(path)
+        return posix_path.with_name(f'{posix_path.stem}.{digest[:10]}{posix_path.suffix}').as_posix()
+    
+    def dimensions(self, ref: str) -> Optional[Tuple[int, int]]:
+        info = self.assets.get(asset_path(ref))
+        return info.dimensions if info else None
+    
+    def inlined(self, ref: str, markup: bool = False) -> Optional[str]:
+        """Inline form of an asset under the inlining policy, or None to reference it as a file.
+        
+        Assets up to 'max_bytes' become a data URI, or SVG markup where the
+        caller can place markup and the policy prefers it. Results are
+        memoized; published_assets decides every referenced asset in the main
+        process, before the manifest is shared with the render workers.
+        """
+        path = asset_path(ref)
+        key = (path, markup)
+        if key in self._inlined:
+            return self._inlined[key]
+        info = self.assets.get(path)
+        mime = DATA_URI_TYPES.get(PurePosixPath(path).suffix.lower())
+        value = None
+        if info is not None and mime and self.inline is not None and info.size <= self.inline['max_bytes']:
+            try:
+                value = encode_inline_asset(path, mime, markup and self.inline['svg'] == 'markup')
+            except (OSError, UnicodeDecodeError) as e:
+                print(f"Warning: Could not inline {path}: {e}")
+        self._inlined[key] = value
+        return value
+    
+    def save(self) -> None:
+        """Write probed image dimensions to the size cache, keyed by content hash."""
+        if self.size_cache is None or not self._probed:
+            return
+        sizes = {info.hash: info.dimensions for info in self.assets.values()
+                 if info.path.lower().endswith(IMAGE_EXTENSIONS)}
+        self.size_cache.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = self.size_cache.with_suffix('.tmp')
+        tmp_file.write_text(json.dumps(sizes), encoding='utf-8')
+        os.replace(tmp_file, self.size_cache)
+        self._probed = 0
+
+# Asset manifest of the running build; set by init_render_worker
+ASSETS: Optional[AssetManifest] = None
+
+def current_assets() -> AssetManifest:
+    global ASSETS
+    if ASSETS is None:
+        ASSETS = AssetManifest()
+    return ASSETS
+
+def media_size_attrs(ref: str, width: Any, height: Any) -> str:
+    """Return width/height attributes for a media reference.
+    
+    Values from config.json win; when one or both are omitted for a local
+    image, they are filled in from the intrinsic size in the asset manifest
+    (scaled to keep the aspect ratio if only one is given).
+    """
+    if not (width and height) and ref and not ref.startswith('http'):
+        dimensions = current_assets().dimensions(ref)
+        if dimensions and dimensions[0] and dimensions[1]:
+            intrinsic_width, intrinsic_height = dimensions
+            try:
+                if width:
+                    height = round(float(width) * intrinsic_height / intrinsic_width)
+                elif height:
+                    width = round(float(height) * intrinsic_width / intrinsic_height)
+                else:
+                    width, height = intrinsic_width, intrinsic_height
+            except ValueError:
+                pass
+    size_attrs = ''
+    if width:
+        size_attrs += f' width="{width}"'
+    if height:
+        size_attrs += f' height="{height}"'
+    return size_attrs
+
+def asset_url(ref: str, base_url: str) -> str:
+    """Return the public URL of a media reference, resolved through the asset manifest
+    (bare file names live in assets/, content-hashed names when enabled)."""
+    if not ref or ref.startswith('http'):
+        return ref
+    assets = current_assets()
+    if assets.exists(ref):
+        return f'{base_url}/{assets.published_path(ref)}'
+    return base_url + ref
+
+def render_image(ref: str, base_url: str, attrs: str, sizes: Optional[str] = None) -> str:
+    """Render an <img> for a media reference, with srcset (and <picture> sources for
+    other formats) when the image pipeline produced derivatives for it.
+    
+    attrs holds the alt, class and size attributes.
+    """
+    assets = current_assets()
+    local = ref and not ref.startswith('http')
+    inlined = assets.inlined(ref) if local else None
+    if inlined:
+        return f'<img src="{inlined}"{attrs}>'
+    url = asset_url(ref, base_url)
+    derivatives = assets.derivatives.get(asset_path(ref)) if local else None
+    if not derivatives:
+        return f'<img src="{url}"{attrs}>'
+    
+    sizes = sizes or assets.responsive['sizes']
+    srcsets: Dict[str, List[str]] = {}
+    for derivative in derivatives:
+        srcsets.setdefault(derivative.format, []).append(f'{base_url}/{derivative.path} {derivative.width}w')
+    
+    # An image narrower than every configured width only has derivatives in the extra formats
+    source_format = RESPONSIVE_SOURCE_EXTENSIONS[Path(asset_path(ref)).suffix.lower()]
+    smaller = srcsets.pop(source_format, [])
+    if smaller:
+        intrinsic_width = assets.dimensions(ref)[0]
+        fallback = ', '.join(smaller + [f'{url} {intrinsic_width}w'])
+        img = f'<img src="{url}" srcset="{fallback}" sizes="{sizes}"{attrs}>'
+    else:
+        img = f'<img src="{url}"{attrs}>'
+    if not srcsets:
+        return img
+    sources = ''.join(f'<source type="image/{fmt}" srcset="{", ".join(srcset)}" sizes="{sizes}">' for fmt, srcset in srcsets.items())
+    return f'<picture>{sources}{img}</picture>'
+
+FOAM_SVG_MODES = ('inline', 'symbol', 'external')
+# One sprite per site instead of a copy of the SVG in every hero page
+FOAM_SVG_DEFAULT = 'symbol'
+# Positions the decoration behind the hero media
+FOAM_STYLE = 'position: absolute; top: 50%; left: 50%; width: 150%; height: 150%; z-index: 1; opacity: 0.3; transform: translate(-50%, -50%) scale(1.5); pointer-events: none;'
+# foam.svg hash -> inline markup
+_FOAM_SVG_CACHE: Dict[str, str] = {}
+
+def load_foam_svg() -> str:
+    """Load foam.svg content for inline use; read and rewritten once per file version"""
+    info = current_assets().get(FOAM_SVG)
+    if info is None:
+        return ''
+    svg_content = _FOAM_SVG_CACHE.get(info.hash)
+    if svg_content is None:
+        svg_content = Path(FOAM_SVG).read_text(encoding='utf-8')
+        # Remove XML declaration and adjust style for inline use
+        svg_content = svg_content.replace('<?xml version="1.0" encoding="utf-8"?>', '')
+        svg_content = svg_content.replace('style="margin: auto; background: none; display: block; z-index: 1; position: relative; shape-rendering: auto;"',
+                                          f'style="{FOAM_STYLE}"')
+        _FOAM_SVG_CACHE[info.hash] = svg_content
+    return svg_content
+
+def foam_symbol_svg() -> str:
+    """Return foam.svg as a sprite holding a single <symbol id="foam">, for <use> references."""
+    source = Path(FOAM_SVG).read_text(encoding='utf-8')
+    root = re.search(r'<svg\b[^>]*>', source)
+    view_box = _svg_attribute(root.group(0), 'viewBox')
+    aspect_ratio = _svg_attribute(root.group(0), 'preserveAspectRatio')
+    attrs = f' viewBox="{view_box}"' if view_box else ''
+    if aspect_ratio:
+        attrs += f' preserveAspectRatio="{aspect_ratio}"'
+    inner = source[root.end():source.rindex('</svg>')]
+    return (f'<svg xmlns="http://www.w3.org/2000/svg" xmlns:xlink="http://www.w3.org/1999/xlink">'
+            f'<symbol id="foam"{attrs}>{inner}</symbol></svg>\n')
+
+def foam_symbol_path(assets: AssetManifest) -> str:
+    """Path of the foam sprite in dist/, named after foam.svg's hash when filenames are content-hashed."""
+    if assets.hash_names:
+        return f'assets/foam-symbol.{assets.get(FOAM_SVG).hash[:10]}.svg'
+    return 'assets/foam-symbol.svg'
+
+def write_foam_symbol(root: Path, assets: AssetManifest, outputs: Dict[str, Dict[str, str]]) -> str:
+    target = foam_symbol_path(assets)
+    outputs[target] = {FOAM_SVG: assets.get(FOAM_SVG).hash}
+    write_output(root, target, foam_symbol_svg())
+    return target
+
+def foam_svg_mode(config: Dict[str, Any]) -> str:
+    return config.get('foam_svg', FOAM_SVG_DEFAULT)
+
+def render_foam_svg(config: Dict[str, Any]) -> str:
+    """Return the foam decoration behind hero media in the configured 'foam_svg' mode.
+    
+    'inline' pastes the SVG into the page, 'symbol' references a <symbol> in
+    a shared sprite file through <use>, and 'external' loads foam.svg as an
+    image; the last two are cached by the browser across pages.
+    """
+    mode = foam_svg_mode(config)
+    if mode == 'inline':
+        return load_foam_svg()
+    assets = current_assets()
+    if not assets.exists(FOAM_SVG):
+        return ''
+    base_url = config.get('base_url', '')
+    if mode == 'symbol':
+        return f'<svg aria-hidden="true" style="{FOAM_STYLE}"><use href="{base_url}/{foam_symbol_path(assets)}#foam"></use></svg>'
+    if mode == 'external':
+        return f'<img src="{asset_url("/" + FOAM_SVG, base_url)}" alt="" aria-hidden="true" style="{FOAM_STYLE}">'
+    raise ValueError(f"Unknown foam_svg mode '{mode}' (expected one of: {', '.join(FOAM_SVG_MODES)})")
+
+def page_asset_refs(config: Dict[str, Any]) -> Dict[str, List[str]]:
+    """Local assets referenced from the sections of each page, by slug."""
+    return {page['slug']: collect_asset_refs(page.get('sections', [])) for page in config['pages']}
+
+def published_assets(config: Dict[str, Any], assets: AssetManifest,
+                     page_refs: Optional[Dict[str, List[str]]] = None) -> List[str]:
+    """Local assets copied to dist/: the static assets plus every existing asset referenced
+    from config.json or the navigation that is not inlined into the pages."""
+    refs = set(LOGO_FILES)
+    for slug_refs in (page_refs or page_asset_refs(config)).values():
+        refs.update(slug_refs)
+    published = {path for path in refs if assets.exists(path) and not assets.inlined(path, markup=path in LOGO_FILES)}
+    published.update(path for path in STATIC_ASSETS if assets.exists(path))
+    if foam_svg_mode(config) == 'external' and assets.exists(FOAM_SVG):
+        # Inline and symbol pages never reference foam.svg itself
+        published.add(FOAM_SVG)
+    return sorted(published)
+
+ASSET_MANIFEST = 'assets/manifest.json'
+
+def write_asset_manifest(root: Path, assets: AssetManifest, paths: List[str], outputs: Dict[str, Dict[str, str]]) -> Optional[str]:
+    """Write assets/manifest.json mapping each asset to its content-hashed name in dist/; return its path if written."""
+    if not assets.hash_names:
+        return None
+    outputs[ASSET_MANIFEST] = {path: assets.hash_overrides.get(path, assets.get(path).hash) for path in paths}
+    write_output(root, ASSET_MANIFEST, json.dumps({path: assets.published_path(path) for path in paths}, indent=2))
+    return ASSET_MANIFEST
+
+def report_missing_assets(config: Dict[str, Any], assets: AssetManifest,
+                          page_refs: Optional[Dict[str, List[str]]] = None) -> None:
+    """Warn once per build about local assets that config.json references but assets/ lacks."""
+    missing: Dict[str, Set[str]] = {}
+    for slug, refs in (page_refs or page_asset_refs(config)).items():
+        for ref in refs:
+            if not assets.exists(ref):
+                missing.setdefault(asset_path(ref), set()).add(slug)
+    for path, slugs in sorted(missing.items()):
+        print(f"Warning: Asset not found: {path} (used on {', '.join(sorted(slugs))})")
+
+RESPONSIVE_IMAGE_DEFAULTS = {
+    'widths': [480, 800, 1200],
+    # Extra formats, in order of preference; each is used if Pillow can encode it
+    'formats': ['webp'],
+    'sizes': '100vw',
+    'quality': 80,
+}
+# Pillow format name and file extension per <source type="image/...">
+IMAGE_FORMATS = {'jpeg': ('JPEG', 'jpg'), 'png': ('PNG', 'png'), 'webp': ('WEBP', 'webp'), 'avif': ('AVIF', 'avif')}
+RESPONSIVE_SOURCE_EXTENSIONS = {'.jpg': 'jpeg', '.jpeg': 'jpeg', '.png': 'png', '.webp': 'webp'}
+
+class ImageDerivative(NamedTuple):
+    # Path in dist/ (and, prefixed with '/', its URL path)
+    path: str
+    width: int
+    format: str
+
+def responsive_image_settings(config: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Return the 'responsive_images' config merged over the defaults, or None when disabled."""
+    settings = config.get('responsive_images', {})
+    if settings is False or (isinstance(settings, dict) and not settings.get('enabled', True)):
+        return None
+    return {**RESPONSIVE_IMAGE_DEFAULTS, **settings}
+
+def derivative_cache_path(info: AssetInfo, derivative: ImageDerivative, quality: int) -> Path:
+    # Keyed by source content hash, so renamed or unchanged images are never reprocessed
+    return IMAGE_DERIVATIVE_DIR / f"{info.hash}-{derivative.width}-q{quality}.{IMAGE_FORMATS[derivative.format][1]}"
+
+def plan_derivatives(info: AssetInfo, settings: Dict[str, Any], formats: List[str]) -> List[ImageDerivative]:
+    """Derivatives of one image: each configured width below its intrinsic width in
+    the source format, plus every width and the full size in each extra format."""
+    source_format = RESPONSIVE_SOURCE_EXTENSIONS[Path(info.path).suffix.lower()]
+    intrinsic_width = info.dimensions[0]
+    widths = sorted({int(width) for width in settings['widths'] if int(width) < intrinsic_width})
+    stem = f"assets/responsive/{Path(info.path).stem}-{info.hash[:8]}"
+    derivatives = [ImageDerivative(f"{stem}-{width}.{IMAGE_FORMATS[source_format][1]}", width, source_format) for width in widths]
+    for fmt in formats:
+        if fmt != source_format:
+            derivatives.extend(ImageDerivative(f"{stem}-{width}.{IMAGE_FORMATS[fmt][1]}", width, fmt)
+                               for width in widths + [intrinsic_width])
+    return derivatives
+
+def encode_derivative(source: str, target: str, width: int, fmt: str, quality: int) -> None:
+    """Resize source to width and write it to target in the given format."""
+    with Image.open(source) as img:
+        height = max(1, round(img.height * width / img.width))
+        resized = img.resize((width, height), Image.LANCZOS) if width != img.width else img.copy()
+    if fmt == 'jpeg' and resized.mode not in ('RGB', 'L'):
+        resized = resized.convert('RGB')
+    tmp_file = f'{target}.tmp'
+    resized.save(tmp_file, IMAGE_FORMATS[fmt][0], quality=quality)
+    os.replace(tmp_file, target)
+
+# Set once the missing-Pillow warning was printed; watch mode rescans assets on every change
+_PILLOW_WARNING_SHOWN = False
+
+def build_image_derivatives(config: Dict[str, Any], assets: AssetManifest, workers: int = 1,
+                            page_refs: Optional[Dict[str, List[str]]] = None) -> int:
+    """Create the responsive derivatives of every image referenced in config.json.
+    
+    Derivatives are encoded into .build-cache/images/ on a process pool, and
+    recorded in assets.derivatives for the renderers. Returns how many were
+    encoded (the rest came from the cache).
+    """
+    global _PILLOW_WARNING_SHOWN
+    assets.derivatives = {}
+    settings = assets.responsive = responsive_image_settings(config)
+    if settings is None:
+        return 0
+    
+    refs = {ref for slug_refs in (page_refs or page_asset_refs(config)).values() for ref in slug_refs}
+    images = [assets.assets[path] for path in sorted(refs)
+              if path in assets.assets and Path(path).suffix.lower() in RESPONSIVE_SOURCE_EXTENSIONS
+              and assets.assets[path].dimensions]
+    if not images:
+        return 0
+    if Image is None:
+        if not _PILLOW_WARNING_SHOWN:
+            print("Warning: Pillow is not installed - responsive image derivatives are skipped")
+            _PILLOW_WARNING_SHOWN = True
+        return 0
+    
+    Image.init()
+    formats = [fmt for fmt in settings['formats'] if fmt in IMAGE_FORMATS and IMAGE_FORMATS[fmt][0] in Image.SAVE]
+    for fmt in settings['formats']:
+        if fmt not in formats:
+            print(f"Warning: No {fmt} encoder available - {fmt} derivatives are skipped")
+    
+    quality = settings['quality']
+    tasks = []
+    for info in images:
+        derivatives = plan_derivatives(info, settings, formats)
+        if not derivatives:
+            continue
+        assets.derivatives[info.path] = derivatives
+        for derivative in derivatives:
+            target = derivative_cache_path(info, derivative, quality)
+            if not target.exists():
+                tasks.append((info.path, str(target), derivative.width, derivative.format, quality))
+    
+    if tasks:
+        IMAGE_DERIVATIVE_DIR.mkdir(parents=True, exist_ok=True)
+        if workers <= 1 or len(tasks) <= 1:
+            for task in tasks:
+                encode_derivative(*task)
+        else:
+            from concurrent.futures import ProcessPoolExecutor
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                # Propagate encoder errors
+                for _ in pool.map(encode_derivative, *zip(*tasks)):
+                    pass
+    return len(tasks)
+
+def stage_image_derivatives(assets: AssetManifest, root: Path, outputs: Dict[str, Dict[str, str]]) -> None:
+    """Hardlink the cached derivatives into an output tree and record them in outputs."""
+    quality = assets.responsive['quality'] if assets.responsive else 0
+    for path, derivatives in assets.derivatives.items():
+        info = assets.assets[path]
+        for derivative in derivatives:
+            target = root / derivative.path
+            if target.exists():
+                continue
+            link_or_copy(derivative_cache_path(info, derivative, quality), target)
+            outputs[derivative.path] = {path: info.hash}
+            if OUTPUT_STORE is not None and derivative.path not in OUTPUT_STORE.files:
+                # Named after the source hash: a stored copy is current
+                OUTPUT_STORE.put(derivative.path, target.read_bytes())
+
+def load_manifest(manifest_file: Path = MANIFEST_FILE) -> Dict[str, Any]:
+    """Load the manifest of the previous build, or an empty one."""
+    try:
+        manifest = load_json(str(manifest_file))
+    except (OSError, ValueError):
+        return {}
+    if manifest.get('version') != MANIFEST_VERSION:
+        return {}
+    key_sets = manifest.get('translation_key_sets', {})
+    manifest['translation_keys'] = {rel_path: key_sets[set_id] for rel_path, set_id in manifest.get('translation_keys', {}).items()}
+    return manifest
+
+def save_manifest(outputs: Dict[str, Dict[str, str]], hasher: FileHasher, compressed: Dict[str, Any],
+                  selectors: Dict[str, List[str]], translation_keys: Dict[str, List[str]],
+                  manifest_file: Path = MANIFEST_FILE) -> None:
+    manifest_file.parent.mkdir(exist_ok=True)
+    # Pages of the same kind read the same keys in every language: store each key set once
+    key_sets = {}
+    key_set_ids = {}
+    for rel_path, keys in translation_keys.items():
+        set_id = hash_json(keys)
+        key_sets[set_id] = keys
+        key_set_ids[rel_path] = set_id
+    manifest = {'version': MANIFEST_VERSION, 'outputs': outputs, 'files': hasher.files, 'compressed': compressed,
+                'selectors': selectors, 'translation_keys': key_set_ids, 'translation_key_sets': key_sets}
+    tmp_file = manifest_file.with_suffix('.tmp')
+    tmp_file.write_text(json.dumps(manifest, sort_keys=True), encoding='utf-8')
+    os.replace(tmp_file, manifest_file)
+
+# Section and feature keys whose values are media references, bare file names included
+MEDIA_FIELDS = ('media', 'image')
+
+def media_refs(value: Any) -> List[str]:
+    """Local asset paths of a media field: one reference, or references per language plus width/height."""
+    if isinstance(value, dict):
+        values = [item for key, item in value.items() if key not in ('width', 'height')]
+    else:
+        values = [value]
+    return [asset_path(item) for item in values if isinstance(item, str) and item and not item.startswith('http')]
+
+def collect_asset_refs(value: Any) -> List[str]:
+    """Find every local asset referenced anywhere in a section config, as a path under assets/.
+    
+    Media fields count with bare file names too ('crm.jpg' is assets/crm.jpg,
+    as the renderers resolve it); other strings only when they start with assets/.
+    """
+    refs: List[str] = []
+    
+    def walk(value: Any) -> None:
+        # One list for the whole walk; this runs over every page on every build
+        if isinstance(value, dict):
+            for key, item in value.items():
+                if key in MEDIA_FIELDS:
+                    refs.extend(media_refs(item))
+                elif isinstance(item, (dict, list)):
+                    walk(item)
+                elif isinstance(item, str) and item.lstrip('/').startswith('assets/'):
+                    refs.append(asset_path(item))
+        elif isinstance(value, list):
+            for item in value:
+                if isinstance(item, (dict, list)):
+                    walk(item)
+                elif isinstance(item, str) and item.lstrip('/').startswith('assets/'):
+                    refs.append(asset_path(item))
+        elif isinstance(value, str) and value.lstrip('/').startswith('assets/'):
+            refs.append(asset_path(value))
+    
+    walk(value)
+    return refs
+
+def site_fingerprint(config: Dict[str, Any]) -> str:
+    """Hash of the config every page depends on: everything except the page sections."""
+    site = dict(config)
+    site['pages'] = [{k: v for k, v in page.items() if k != 'sections'} for page in config['pages']]
+    return hash_json(site)
+
+def translation_keys_hash(translations: TranslationStore, lang: str, translation_keys: List[str],
+                          memo: Optional[Dict[Any, Any]] = None) -> str:
+    """Hash of the values of translation_keys in lang; memoized in memo per (language, key set)."""
+    memo_key = ('keys', lang, tuple(translation_keys))
+    digest = memo.get(memo_key) if memo is not None else None
+    if digest is None:
+        bundle = translations.get(lang)
+        digest = hash_json([[key, bundle.get(key)] for key in translation_keys])
+        if memo is not None:
+            memo[memo_key] = digest
+    return digest
+
+def with_translation_keys(deps: Dict[str, str], lang: str, translations: TranslationStore, translation_keys: List[str],
+                          memo: Optional[Dict[Any, Any]] = None) -> Dict[str, str]:
+    """Copy of an output's dependencies that depends on translation_keys instead of the translations it had."""
+    deps = dict(deps)
+    deps.pop(f'translations/{lang}.json', None)
+    deps[f'translations/{lang}.json#keys'] = translation_keys_hash(translations, lang, translation_keys, memo)
+    return deps
+
+def job_dependencies(job: Tuple[str, str, Any], config: Dict[str, Any], site_hash: str, hasher: FileHasher, blog: BlogCorpus,
+                     assets: AssetManifest, translations: TranslationStore, translation_keys: Optional[List[str]] = None,
+                     memo: Optional[Dict[Any, Any]] = None) -> Dict[str, str]:
+    """Hashes of every input a render job's output depends on.
+    
+    Keys are the source paths the hashes were taken from, optionally followed
+    by '#part' for a slice of a file; keys ending in '/' cover a directory.
+    translation_keys are the keys the output read when it was last rendered;
+    without them it depends on the whole translation file. memo is shared by
+    the jobs of one build, so the parts common to several jobs (a page in
+    every language, a key set) are hashed once.
+    """
+    memo = {} if memo is None else memo
+    kind, lang, target = job
+    deps = {
+        GENERATOR_FILE.name: hasher.hash(GENERATOR_FILE),
+        'template.html': hasher.hash('template.html'),
+        'config.json': site_hash,
+    }
+    if translation_keys is None:
+        deps[f'translations/{lang}.json'] = hasher.hash(f'translations/{lang}.json')
+    else:
+        deps[f'translations/{lang}.json#keys'] = translation_keys_hash(translations, lang, translation_keys, memo)
+    asset_refs = list(LOGO_FILES)
+    if config.get('hash_asset_filenames'):
+        # The stylesheet URL carries its content hash (of the pruned stylesheet with prune_css)
+        deps['assets/styles.css'] = assets.published_path('assets/styles.css')
+    if config.get('critical_css'):
+        # Part of the stylesheet is inlined into the page
+        deps['assets/styles.css#critical'] = hasher.hash(STYLESHEET)
+    
+    if kind == 'page':
+        page = config['pages'][target]
+        page_info = memo.get(('page', target))
+        if page_info is None:
+            # The same in every language
+            section_types = {section.get('type') for section in page.get('sections', [])}
+            page_refs = collect_asset_refs(page.get('sections', []))
+            if 'hero' in section_types:
+                page_refs.append(FOAM_SVG)
+            page_info = memo[('page', target)] = (hash_json(page), page_refs, 'blog_index' in section_types)
+        page_hash, page_refs, lists_posts = page_info
+        deps[f"config.json#pages/{page['slug']}"] = page_hash
+        for plugin in config.get('section_plugins', []):
+            deps[plugin] = hasher.hash(plugin)
+        asset_refs.extend(page_refs)
+        if lists_posts:
+            deps[f'blog/{lang}/'] = hash_json([[md_file.name, hasher.hash(md_file)] for md_file in blog.files(lang)])
+    else:
+        deps[Path(target).as_posix()] = hasher.hash(target)
     
+    for ref in sorted(set(asset_refs)):
+        deps[ref] = hasher.hash(ref)
+    return deps
+
+def depends_on(deps: Dict[str, str], changed: Set[str]) -> bool:
+    """Check whether any of the changed source paths is among an output's dependencies."""
+    for key in deps:
+        source = key.split('#', 1)[0]
+        if source.endswith('/'):
+            if any(path.startswith(source) for path in changed):
+                return True
+        elif source in changed:
+            return True
+    return False
+
+# Shared state for render workers. Set once per process by init_render_worker so
+# that config, template and translations are not pickled again for every job.
+_WORKER_STATE: Dict[str, Any] = {}
+
+def init_render_worker(config: Dict[str, Any], template: CompiledTemplate, translations: TranslationStore, blog: BlogCorpus, assets: AssetManifest,
+                       section_cache: Optional[SectionCache] = None, profile: bool = False) -> None:
+    global PROFILER, ASSETS, SECTION_CACHE
+    ASSETS = assets
+    SECTION_CACHE = section_cache
+    _SECTION_KEY_PARTS.clear()
+    # No-op in forked workers, which inherit the registry
+    load_section_plugins(config)
+    if profile:
+        # Worker processes record into their own profiler; see run_worker_job
+        PROFILER = BuildProfiler()
+    _WORKER_STATE['config'] = config
+    _WORKER_STATE['template'] = template
+    _WORKER_STATE['translations'] = translations
+    _WORKER_STATE['blog'] = blog
+    # Built lazily per process, so chrome is computed once per language and worker
+    _WORKER_STATE['chrome'] = PageChrome(config)
+
+def collect_render_jobs(config: Dict[str, Any], blog: BlogCorpus) -> List[Tuple[str, str, Any]]:
+    """List every (kind, lang, target) render job of a build in output order."""
+    jobs = []
     for lang in config['languages'].keys():
-        lang_dir = dist / lang
-        lang_dir.mkdir()
-        
-        for page in config['pages']:
-            html = generate_page(page, config, lang, template)
-            
-            if page['slug'] == 'home':
-                (lang_dir / 'index.html').write_text(html, encoding='utf-8')
-            else:
-                (lang_dir / f"{page['slug']}.html").write_text(html, encoding='utf-8')
-        
-        # Generate individual blog post pages
-        blog_dir = Path('blog') / lang
-        if blog_dir.exists():
-            blog_output_dir = lang_dir / 'blog'
-            blog_output_dir.mkdir(exist_ok=True)
-            
-            lang_data = load_json(f'translations/{lang}.json')
-            
-            for md_file in blog_dir.glob('*.md'):
-                post = parse_blog_post(md_file)
-                if post:
-                    # Create a minimal page structure for blog posts
-                    blog_post_html = render_blog_post(post, lang_data, config, lang)
-                    
-                    nav_html = render_nav(config, lang_data, 'blog', lang)
-                    lang_switcher_html = render_lang_switcher(config, 'blog', lang)
-                    nav_logo_html = render_nav_logo(config, lang_data, False)
-                    
-                    phone = config['languages'][lang].get('phone', '')
-                    email = config.get('contact_email', '')
-                    base_url = config.get('base_url', '')
-                    
-                    page_html = template.replace('{{TITLE}}', f"{post['title']} - {translate('site_title', lang_data)}")
-                    page_html = page_html.replace('{{META_DESCRIPTION}}', post['excerpt'])
-                    page_html = page_html.replace('{{LANG}}', lang)
-                    page_html = page_html.replace('{{BASE_URL}}', base_url)
-                    page_html = page_html.replace('{{SKIP_TO_CONTENT}}', translate('skip_to_content', lang_data))
-                    page_html = page_html.replace('{{NAV_HOME_LABEL}}', translate('nav_home_label', lang_data))
-                    page_html = page_html.replace('{{NAV_LOGO}}', nav_logo_html)
-                    page_html = page_html.replace('{{NAV_TITLE}}', translate('site_brand', lang_data))
-                    page_html = page_html.replace('{{NAV_LINKS}}', nav_html)
-                    page_html = page_html.replace('{{LANG_SWITCHER}}', lang_switcher_html)
-                    page_html = page_html.replace('{{CONTENT}}', blog_post_html)
-                    page_html = page_html.replace('{{CONTACT_INFO_LABEL}}', translate('contact_info_label', lang_data))
-                    page_html = page_html.replace('{{CONTACT_PHONE}}', translate('contact_phone', lang_data))
-                    page_html = page_html.replace('{{CONTACT_EMAIL}}', translate('contact_email', lang_data))
-                    page_html = page_html.replace('{{DEMO_URL}}', config.get('demo_url', ''))
-                    page_html = page_html.replace('{{CALENDLY_URL}}', config.get('calendly_url', ''))
-                    page_html = page_html.replace('{{ONLINE_DEMO}}', translate('online_demo', lang_data))
-                    page_html = page_html.replace('{{BOOK_DEMO}}', translate('book_demo', lang_data))
-                    page_html = page_html.replace('{{PHONE}}', phone)
-                    page_html = page_html.replace('{{EMAIL}}', email)
-                    page_html = page_html.replace('{{FOOTER_TEXT}}', translate('footer_text', lang_data))
-                    
-                    (blog_output_dir / f"{post['slug']}.html").write_text(page_html, encoding='utf-8')
+        for page_idx in range(len(config['pages'])):
+            jobs.append(('page', lang, page_idx))
+        for md_file in blog.files(lang):
+            jobs.append(('post', lang, str(md_file)))
+    return jobs
+
+def run_render_job(job: Tuple[str, str, Any]) -> Optional[Tuple[str, str, List[str]]]:
+    """Render a single job and return (output path relative to dist/, html, translation keys read)."""
+    if PROFILER is not None:
+        start = time.perf_counter()
+        result = _run_render_job(job)
+        if result is not None:
+            PROFILER.pages[result[0]] = time.perf_counter() - start
+        return result
+    return _run_render_job(job)
+
+def run_worker_job(job: Tuple[str, str, Any]) -> Tuple[Optional[Tuple[str, str, List[str]]], Any, Optional[Dict[str, Any]]]:
+    """Render a job in a worker process and return what the worker's section cache and profiler recorded."""
+    result = run_render_job(job)
+    return (result, SECTION_CACHE.drain() if SECTION_CACHE is not None else None,
+            PROFILER.drain() if PROFILER is not None else None)
+
+def _run_render_job(job: Tuple[str, str, Any]) -> Optional[Tuple[str, str, List[str]]]:
+    kind, lang, target = job
+    config = _WORKER_STATE['config']
+    template = _WORKER_STATE['template']
+    # Records the translation keys the output reads, for job_dependencies
+    lang_data = RecordingTranslations(_WORKER_STATE['translations'].get(lang))
+    chrome = _WORKER_STATE['chrome']
+    blog = _WORKER_STATE['blog']
+    
+    if kind == 'page':
+        page = config['pages'][target]
+        html = generate_page(page, config, lang, template, lang_data, chrome, blog)
+    else:
+        post = blog.get(target)
+        if not post:
+            return None
+        html = render_blog_post_page(post, config, lang, template, lang_data, chrome)
+    
+    rel_path = job_output_path(job, config)
+    if config.get('minify_html'):
+        with profile_stage('minify'):
+            minified = minify_html(html)
+        if PROFILER is not None:
+            PROFILER.minify_savings[rel_path] = len(html.encode('utf-8')) - len(minified.encode('utf-8'))
+        html = minified
+    return rel_path, html, sorted(lang_data)
+
+def render_all(jobs: List[Tuple[str, str, Any]], config: Dict[str, Any], template: CompiledTemplate, translations: TranslationStore, blog: BlogCorpus, assets: AssetManifest, workers: int,
+               section_cache: Optional[SectionCache] = None) -> List[Optional[Tuple[str, str, List[str]]]]:
+    """Render jobs serially or on a process pool; results keep the job order."""
+    if workers <= 1 or len(jobs) <= 1:
+        init_render_worker(config, template, translations, blog, assets, section_cache)
+        return [run_render_job(job) for job in jobs]
+    
+    # Parse every post here so workers share the parsed corpus
+    blog.load_all(list(config['languages'].keys()))
+    chunksize = max(1, len(jobs) // (workers * 4))
+    # Imported here: loading multiprocessing is a noticeable part of a single-process no-op build
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_render_worker,
+                             initargs=(config, template, translations, blog, assets, section_cache, PROFILER is not None)) as executor:
+        results = []
+        for result, cache_data, profile_data in executor.map(run_worker_job, jobs, chunksize=chunksize):
+            if cache_data is not None:
+                section_cache.merge(cache_data)
+            if profile_data is not None:
+                PROFILER.merge(profile_data)
+            results.append(result)
+        return results
+
+def write_output(root: Path, rel_path: str, content: str) -> None:
+    """Write an output file, replacing any existing file atomically."""
+    out_path = root / rel_path
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    data = content.encode('utf-8')
+    tmp_path = out_path.with_name(f'.{out_path.name}.tmp')
+    tmp_path.write_bytes(data)
+    os.replace(tmp_path, out_path)
+    if PROFILER is not None:
+        PROFILER.output_sizes[rel_path] = len(data)
+    if OUTPUT_STORE is not None:
+        OUTPUT_STORE.put(rel_path, data)
+
+def copy_output(root: Path, rel_path: str, src: Any) -> None:
+    """Copy a file into the output tree, replacing any existing file atomically."""
+    out_path = root / rel_path
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = out_path.with_name(f'.{out_path.name}.tmp')
+    shutil.copy(src, tmp_path)
+    os.replace(tmp_path, out_path)
+    if OUTPUT_STORE is not None:
+        OUTPUT_STORE.put(rel_path, out_path.read_bytes())
+
+def link_or_copy(src: Path, dst: Path) -> None:
+    """Reuse an unchanged output from the previous tree without rewriting it."""
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        os.link(src, dst)
+    except OSError:
+        # Filesystem without hardlink support
+        shutil.copy2(src, dst)
+
+COMPRESSIBLE_EXTENSIONS = ('.html', '.css', '.svg', '.js', '.json', '.xml', '.txt')
+# Smaller responses fit in a single packet either way
+MIN_COMPRESS_SIZE = 256
+
+def compress_output(path: str, encodings: Tuple[str, ...]) -> None:
+    """Write .gz (and .br) siblings of a file at maximum compression."""
+    data = Path(path).read_bytes()
+    for encoding in encodings:
+        if encoding == 'gz':
+            # mtime=0 keeps the output reproducible
+            compressed = gzip.compress(data, compresslevel=9, mtime=0)
+        else:
+            compressed = brotli.compress(data, quality=11)
+        tmp_path = f'{path}.{encoding}.tmp'
+        Path(tmp_path).write_bytes(compressed)
+        os.replace(tmp_path, f'{path}.{encoding}')
+
+def precompress_outputs(root: Path, paths: List[str], previous: Dict[str, Any], reuse_root: Path, workers: int) -> Dict[str, Any]:
+    """Write compressed siblings for the text files among paths (relative to root).
+    
+    previous maps output paths to [content hash, encodings] from the last build;
+    files whose entry is unchanged reuse the siblings in reuse_root instead of
+    being compressed again. Returns the entries for paths.
+    """
+    encodings = ('gz', 'br') if brotli is not None else ('gz',)
+    entries = {}
+    tasks = []
+    for rel_path in paths:
+        if not rel_path.endswith(COMPRESSIBLE_EXTENSIONS):
+            continue
+        data = (root / rel_path).read_bytes()
+        if len(data) < MIN_COMPRESS_SIZE:
+            continue
+        entry = entries[rel_path] = [hash_bytes(data), list(encodings)]
+        siblings = [(reuse_root / f'{rel_path}.{encoding}', root / f'{rel_path}.{encoding}') for encoding in encodings]
+        if previous.get(rel_path) == entry and all(src.exists() for src, _ in siblings):
+            for src, dst in siblings:
+                if src != dst:
+                    link_or_copy(src, dst)
+            continue
+        tasks.append(str(root / rel_path))
     
+    if workers <= 1 or len(tasks) <= 1:
+        for task in tasks:
+            compress_output(task, encodings)
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for _ in pool.map(compress_output, tasks, [encodings] * len(tasks), chunksize=8):
+                pass
+    return entries
+
+def _exchange_paths(a: Path, b: Path) -> bool:
+    """Atomically exchange two paths with renameat2(RENAME_EXCHANGE) where available."""
+    if not sys.platform.startswith('linux'):
+        return False
+    try:
+        libc = ctypes.CDLL(None, use_errno=True)
+        renameat2 = libc.renameat2
+    except (OSError, AttributeError):
+        return False
+    AT_FDCWD = -100
+    RENAME_EXCHANGE = 2
+    return renameat2(AT_FDCWD, os.fsencode(a), AT_FDCWD, os.fsencode(b), RENAME_EXCHANGE) == 0
+
+def swap_directories(staging: Path, dist: Path) -> None:
+    """Replace dist with the finished staging tree and remove the old tree."""
+    if not dist.exists():
+        staging.rename(dist)
+        return
+    if _exchange_paths(staging, dist):
+        # staging now holds the previous tree
+        shutil.rmtree(staging)
+        return
+    # Fallback: two renames, leaving dist/ missing only between them
+    old = dist.with_name(f'.{dist.name}.old')
+    if old.exists():
+        shutil.rmtree(old)
+    dist.rename(old)
+    staging.rename(dist)
+    shutil.rmtree(old)
+
+def render_root_index(config: Dict[str, Any]) -> str:
+    """Render the root index.html that redirects to the visitor's language."""
     default_lang = config.get('default_language', list(config['languages'].keys())[0])
     base_url = config.get('base_url', '')
     
@@ -1142,7 +2866,667 @@ def main():
 </body>
 </html>'''
     
-    (dist / 'index.html').write_text(index_html, encoding='utf-8')
+    return index_html
+
+class SiteBuilder:
+    """Builds dist/ from the sources, keeping the manifest between builds.
+    
+    build() produces a complete staged tree. rebuild() is used by watch mode:
+    it maps changed source files to the outputs that depend on them and
+    re-renders only those, in place.
+    """
+    
+    # Sources that change the set of outputs or the way every page renders
+    STRUCTURAL_SOURCES = {'config.json', GENERATOR_FILE.name}
+    
+    def __init__(self, dist: Path, workers: int = 1, clean: bool = False, manifest_file: Path = MANIFEST_FILE):
+        self.dist = dist
+        self.workers = workers
+        self.manifest_file = manifest_file
+        previous = {} if clean else load_manifest(manifest_file)
+        self.outputs: Dict[str, Dict[str, str]] = previous.get('outputs', {})
+        self.hasher = FileHasher(previous.get('files'))
+        self.compressed: Dict[str, Any] = previous.get('compressed', {})
+        # Tags, classes and ids per page, for prune_css
+        self.selectors: Dict[str, List[str]] = previous.get('selectors', {})
+        # Translation keys each output read when it was rendered
+        self.translation_keys: Dict[str, List[str]] = previous.get('translation_keys', {})
+        self.blog = BlogCorpus(cache_file=BLOG_CACHE_FILE)
+        self.load_sources()
+        self.section_cache = SectionCache(SECTION_CACHE_FILE, self.section_cache_version(), load=not clean)
+    
+    def section_cache_version(self) -> str:
+        """Version of the section cache, invalidated by code changes: generate.py and the section plugins."""
+        return hash_json([self.hasher.hash(path) for path in [GENERATOR_FILE.name] + self.config.get('section_plugins', [])])
+    
+    def load_sources(self) -> None:
+        with profile_stage('load config'):
+            self.config = load_json('config.json')
+            self.site_hash = site_fingerprint(self.config)
+            # Walked once per config instead of once per build step
+            self.page_refs = page_asset_refs(self.config)
+            load_section_plugins(self.config)
+        with profile_stage('load template'):
+            self.template = load_template()
+        with profile_stage('load translations'):
+            languages = list(self.config['languages'].keys())
+            self.translations = TranslationStore(languages, self.config.get('default_language')).load_all()
+    
+    def render(self, jobs: List[Tuple[str, str, Any]]) -> List[Optional[Tuple[str, str, List[str]]]]:
+        return render_all(jobs, self.config, self.template, self.translations, self.blog, self.assets, self.workers, self.section_cache)
+    
+    def build(self) -> int:
+        """Build the whole site into a staging tree and swap it in; return the number of rendered pages."""
+        # Build into a staging directory next to dist/ and swap it in at the end, so
+        # anything serving dist/ never sees a partially written tree.
+        dist = self.dist
+        staging = dist.with_name(f'.{dist.name}.staging')
+        if staging.exists():
+            shutil.rmtree(staging)
+        previous_outputs = self.outputs
+        hasher = self.hasher = self.hasher.next_build()
+        outputs: Dict[str, Dict[str, str]] = {}
+        # A section plugin may have been edited or added since the cache was loaded
+        version = self.section_cache_version()
+        if version != self.section_cache.version:
+            self.section_cache = SectionCache(SECTION_CACHE_FILE, version, load=False)
+        
+        def is_current(rel_path: str, deps: Dict[str, str]) -> bool:
+            return previous_outputs.get(rel_path) == deps and (dist / rel_path).exists()
+        
+        prune = self.config.get('prune_css', False)
+        with profile_stage('scan assets'):
+            stylesheet_hash = next((deps[f'{STYLESHEET}#pruned'] for deps in previous_outputs.values()
+                                    if f'{STYLESHEET}#pruned' in deps), None)
+            self.assets = AssetManifest(hasher, size_cache=IMAGE_SIZE_CACHE_FILE,
+                                        hash_names=self.config.get('hash_asset_filenames', False),
+                                        inline=inline_asset_settings(self.config))
+            if prune and stylesheet_hash:
+                # Assume the pruned stylesheet of the previous build; corrected after rendering if it changed
+                self.assets.hash_overrides[STYLESHEET] = stylesheet_hash
+            report_missing_assets(self.config, self.assets, self.page_refs)
+        with profile_stage('image derivatives'):
+            build_image_derivatives(self.config, self.assets, self.workers, self.page_refs)
+        
+        (staging / 'assets').mkdir(parents=True)
+        with profile_stage('copy assets'):
+            assets = published_assets(self.config, self.assets, self.page_refs)
+            for asset in assets:
+                if prune and asset == STYLESHEET:
+                    continue
+                target = self.assets.published_path(asset)
+                deps = {asset: hasher.hash(asset)}
+                outputs[target] = deps
+                if is_current(target, deps):
+                    link_or_copy(dist / target, staging / target)
+                else:
+                    copy_output(staging, target, asset)
+            write_asset_manifest(staging, self.assets, assets, outputs)
+            if foam_svg_mode(self.config) == 'symbol' and self.assets.exists(FOAM_SVG):
+                write_foam_symbol(staging, self.assets, outputs)
+            stage_image_derivatives(self.assets, staging, outputs)
+        
+        with profile_stage('check dependencies'):
+            self.blog.refresh()
+            jobs = collect_render_jobs(self.config, self.blog)
+            self.total_jobs = len(jobs)
+            dirty_jobs = []
+            translation_keys = {}
+            memo = {}
+            for job in jobs:
+                rel_path = job_output_path(job, self.config)
+                keys = self.translation_keys.get(rel_path)
+                deps = job_dependencies(job, self.config, self.site_hash, hasher, self.blog, self.assets, self.translations, keys, memo)
+                outputs[rel_path] = deps
+                if is_current(rel_path, deps):
+                    link_or_copy(dist / rel_path, staging / rel_path)
+                    translation_keys[rel_path] = keys
+                else:
+                    dirty_jobs.append(job)
+        
+        selectors = {}
+        
+        def render_and_write(jobs: List[Tuple[str, str, Any]]) -> None:
+            with profile_stage('render'):
+                results = self.render(jobs)
+            with profile_stage('write'):
+                for job, result in zip(jobs, results):
+                    if result is None:
+                        # Unparseable post: leave it out of the manifest so it is retried
+                        outputs.pop(job_output_path(job, self.config))
+                        continue
+                    rel_path, html, keys = result
+                    write_output(staging, rel_path, html)
+                    translation_keys[rel_path] = keys
+                    if keys != self.translation_keys.get(rel_path):
+                        outputs[rel_path] = with_translation_keys(outputs[rel_path], job[1], self.translations, keys, memo)
+                    if prune:
+                        selectors[rel_path] = page_selectors(html)
+        
+        render_and_write(dirty_jobs)
+        rendered = len(dirty_jobs)
+        
+        if prune:
+            with profile_stage('prune css'):
+                for rel_path in outputs:
+                    if rel_path.endswith('.html') and rel_path not in selectors:
+                        selectors[rel_path] = self.selectors.get(rel_path) or page_selectors((staging / rel_path).read_text(encoding='utf-8'))
+                previous_target = self.write_pruned_stylesheet(staging, outputs, selectors)
+                if previous_target:
+                    self.relink_stylesheet(staging, outputs, previous_target)
+                    write_asset_manifest(staging, self.assets, assets, outputs)
+        
+        index_deps = {GENERATOR_FILE.name: hasher.hash(GENERATOR_FILE), 'config.json': self.site_hash}
+        outputs['index.html'] = index_deps
+        if is_current('index.html', index_deps):
+            link_or_copy(dist / 'index.html', staging / 'index.html')
+        else:
+            root_index = render_root_index(self.config)
+            write_output(staging, 'index.html', minify_html(root_index) if self.config.get('minify_html') else root_index)
+        
+        compressed = {}
+        if self.config.get('precompress'):
+            with profile_stage('precompress'):
+                compressed = precompress_outputs(staging, sorted(outputs), self.compressed, dist, self.workers)
+        
+        # Outputs of removed pages, posts and assets were never staged, so they
+        # disappear with the old tree.
+        with profile_stage('swap and save manifest'):
+            swap_directories(staging, dist)
+            self.outputs = outputs
+            self.compressed = compressed
+            self.selectors = selectors
+            self.translation_keys = translation_keys
+            save_manifest(outputs, hasher, compressed, selectors, translation_keys, self.manifest_file)
+            self.blog.save()
+            self.assets.save()
+            # Sections of a site that was rendered completely are all marked used
+            self.section_cache.save(prune=rendered == self.total_jobs)
+        return rendered
+    
+    def write_pruned_stylesheet(self, root: Path, outputs: Dict[str, Dict[str, str]], selectors: Dict[str, List[str]]) -> Optional[str]:
+        """Write styles.css pruned to the selectors of every page into root.
+        
+        Returns the name the pages link when content-hashed names are on and
+        the pruned stylesheet's name changed (see relink_stylesheet), else None.
+        """
+        used = css_safelist(self.config)
+        for tokens in selectors.values():
+            used.update(tokens)
+        source = Path(STYLESHEET).read_text(encoding='utf-8')
+        pruned = prune_css(source, used)
+        digest = hash_bytes(pruned.encode('utf-8'))
+        previous_target = None
+        if self.assets.hash_names and self.assets.hash_overrides.get(STYLESHEET) != digest:
+            previous_target = self.assets.published_path(STYLESHEET)
+            outputs.pop(previous_target, None)
+        self.assets.hash_overrides[STYLESHEET] = digest
+        target = self.assets.published_path(STYLESHEET)
+        outputs[target] = {STYLESHEET: self.hasher.hash(STYLESHEET), f'{STYLESHEET}#pruned': digest}
+        write_output(root, target, pruned)
+        return previous_target
+    
+    def relink_stylesheet(self, root: Path, outputs: Dict[str, Dict[str, str]], previous_target: str) -> List[str]:
+        """Replace the stylesheet name the pages were rendered with by the pruned stylesheet's
+        name, in place instead of rendering them again; return the rewritten pages."""
+        target = self.assets.published_path(STYLESHEET)
+        old, new = previous_target.encode('utf-8'), target.encode('utf-8')
+        rewritten = []
+        for rel_path, deps in outputs.items():
+            if not rel_path.endswith('.html'):
+                continue
+            data = (root / rel_path).read_bytes()
+            if old not in data:
+                continue
+            # write_output replaces the file, so pages hardlinked from the previous tree stay untouched
+            write_output(root, rel_path, data.replace(old, new).decode('utf-8'))
+            if STYLESHEET in deps:
+                deps[STYLESHEET] = target
+            rewritten.append(rel_path)
+        return rewritten
+    
+    def rebuild(self, changed: Set[str]) -> int:
+        """Update only the outputs that depend on the changed source paths; return how many were updated."""
+        changed = {Path(path).as_posix() for path in changed}
+        known_sources = {key.split('#', 1)[0] for deps in self.outputs.values() for key in deps}
+        # New or deleted posts change the set of outputs, which needs a full
+        # (still incremental) build.
+        posts_added_or_removed = any(
+            path.startswith('blog/') and path.endswith('.md') and (path not in known_sources or not Path(path).exists())
+            for path in changed
+        )
+        # An edited plugin can register different section types; import it again
+        plugins_changed = changed & set(self.config.get('section_plugins', []))
+        if changed & self.STRUCTURAL_SOURCES or plugins_changed or posts_added_or_removed or not self.dist.exists():
+            _LOADED_SECTION_PLUGINS.difference_update(plugins_changed)
+            self.load_sources()
+            return self.build()
+        
+        if 'template.html' in changed:
+            self.template = load_template()
+        for lang in self.translations.languages:
+            if self.translations.path(lang).as_posix() in changed:
+                self.translations.invalidate(lang)
+                self.translations.get(lang)
+        
+        affected = {rel_path for rel_path, deps in self.outputs.items() if depends_on(deps, changed)}
+        if not affected:
+            return 0
+        
+        hasher = self.hasher = self.hasher.next_build()
+        updated = []
+        prune = self.config.get('prune_css', False)
+        if any(path.startswith('assets/') for path in changed):
+            hash_overrides = self.assets.hash_overrides
+            self.assets = AssetManifest(hasher, size_cache=IMAGE_SIZE_CACHE_FILE,
+                                        hash_names=self.config.get('hash_asset_filenames', False),
+                                        inline=inline_asset_settings(self.config))
+            self.assets.hash_overrides = hash_overrides
+            build_image_derivatives(self.config, self.assets, self.workers, self.page_refs)
+            stage_image_derivatives(self.assets, self.dist, self.outputs)
+            assets = published_assets(self.config, self.assets, self.page_refs)
+            for asset in assets:
+                if asset in changed and not (prune and asset == STYLESHEET):
+                    # Old content-hashed copies are dropped by the next full build
+                    target = self.assets.published_path(asset)
+                    self.outputs[target] = {asset: hasher.hash(asset)}
+                    copy_output(self.dist, target, asset)
+                    updated.append(target)
+            manifest = write_asset_manifest(self.dist, self.assets, assets, self.outputs)
+            if manifest:
+                updated.append(manifest)
+            if FOAM_SVG in changed and foam_svg_mode(self.config) == 'symbol' and self.assets.exists(FOAM_SVG):
+                updated.append(write_foam_symbol(self.dist, self.assets, self.outputs))
+        jobs = []
+        job_deps = {}
+        memo = {}
+        for job in collect_render_jobs(self.config, self.blog):
+            rel_path = job_output_path(job, self.config)
+            if rel_path in affected:
+                deps = job_deps[rel_path] = job_dependencies(job, self.config, self.site_hash, hasher, self.blog, self.assets,
+                                                             self.translations, self.translation_keys.get(rel_path), memo)
+                # A translation edit only affects the outputs that read one of the changed keys
+                if deps != self.outputs[rel_path] or not (self.dist / rel_path).exists():
+                    jobs.append(job)
+        
+        for job, result in zip(jobs, self.render(jobs)):
+            if result is None:
+                rel_path = job_output_path(job, self.config)
+                self.outputs.pop(rel_path)
+                self.translation_keys.pop(rel_path, None)
+                continue
+            rel_path, html, keys = result
+            deps = job_deps[rel_path]
+            if keys != self.translation_keys.get(rel_path):
+                deps = with_translation_keys(deps, job[1], self.translations, keys, memo)
+            self.translation_keys[rel_path] = keys
+            self.outputs[rel_path] = deps
+            write_output(self.dist, rel_path, html)
+            updated.append(rel_path)
+            if prune:
+                self.selectors[rel_path] = page_selectors(html)
+        
+        if prune:
+            previous_target = self.write_pruned_stylesheet(self.dist, self.outputs, self.selectors)
+            if previous_target:
+                # Old content-hashed copies are dropped by the next full build
+                updated.extend(sorted(set(self.relink_stylesheet(self.dist, self.outputs, previous_target)) - set(updated)))
+                updated.append(write_asset_manifest(self.dist, self.assets, published_assets(self.config, self.assets, self.page_refs), self.outputs))
+            updated.append(self.assets.published_path(STYLESHEET))
+        if self.config.get('precompress'):
+            self.compressed.update(precompress_outputs(self.dist, updated, self.compressed, self.dist, self.workers))
+        save_manifest(self.outputs, hasher, self.compressed, self.selectors, self.translation_keys, self.manifest_file)
+        self.blog.save()
+        self.assets.save()
+        self.section_cache.save()
+        return len(updated)
+
+# Sources watched by watch mode, relative to the site directory
+WATCH_PATHS = ('config.json', 'template.html', 'translations', 'blog', 'assets')
+
+def watch_paths(config: Dict[str, Any]) -> Tuple[str, ...]:
+    """WATCH_PATHS plus the section plugins listed in the config."""
+    return WATCH_PATHS + tuple(Path(plugin).as_posix() for plugin in config.get('section_plugins', []))
+
+def snapshot_sources(paths: Tuple[str, ...] = WATCH_PATHS) -> Dict[str, Tuple[int, int]]:
+    """Return (mtime, size) of every watched source file."""
+    snapshot = {}
+    for watch_path in paths:
+        root = Path(watch_path)
+        files = [root] if root.is_file() else (p for p in root.rglob('*') if p.is_file())
+        for file_path in files:
+            try:
+                stat = file_path.stat()
+            except OSError:
+                continue
+            snapshot[file_path.as_posix()] = (stat.st_mtime_ns, stat.st_size)
+    return snapshot
+
+class PollingWatcher:
+    """Detect source changes by comparing periodic snapshots of mtime and size."""
+    
+    name = 'polling'
+    
+    def __init__(self, paths: Tuple[str, ...] = WATCH_PATHS, interval: float = 0.3):
+        self.paths = paths
+        self.interval = interval
+        self.snapshot = snapshot_sources(paths)
+    
+    def wait(self, timeout: Optional[float] = None) -> Set[str]:
+        """Return the paths changed within timeout (block until a change if None)."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            remaining = self.interval if deadline is None else min(self.interval, deadline - time.monotonic())
+            if remaining > 0:
+                time.sleep(remaining)
+            current = snapshot_sources(self.paths)
+            changed = {path for path in current.keys() | self.snapshot.keys()
+                       if current.get(path) != self.snapshot.get(path)}
+            self.snapshot = current
+            if changed or (deadline is not None and time.monotonic() >= deadline):
+                return changed
+
+class InotifyWatcher:
+    """Detect source changes with inotify (requires the inotify_simple package)."""
+    
+    name = 'inotify'
+    
+    def __init__(self, paths: Tuple[str, ...] = WATCH_PATHS):
+        flags = inotify_simple.flags
+        self.paths = paths
+        self.mask = (flags.CLOSE_WRITE | flags.MODIFY | flags.CREATE | flags.DELETE
+                     | flags.MOVED_TO | flags.MOVED_FROM)
+        self.inotify = inotify_simple.INotify()
+        self.watches: Dict[int, str] = {}
+        for watch_path in paths:
+            if Path(watch_path).is_dir():
+                self._add_tree(watch_path)
+        # Directories holding watched files (config.json, template.html,
+        # plugins), where events for other files are ignored
+        self.file_dirs: Set[str] = set()
+        for watch_path in paths:
+            directory = Path(watch_path).parent.as_posix()
+            if not Path(watch_path).is_dir() and directory not in self.watches.values() and Path(directory).is_dir():
+                self._add_watch(directory)
+                self.file_dirs.add(directory)
+    
+    def _add_watch(self, directory: str) -> None:
+        self.watches[self.inotify.add_watch(directory, self.mask)] = directory
+    
+    def _add_tree(self, directory: str) -> None:
+        self._add_watch(directory)
+        for sub_dir in Path(directory).rglob('*'):
+            if sub_dir.is_dir():
+                self._add_watch(sub_dir.as_posix())
+    
+    def wait(self, timeout: Optional[float] = None) -> Set[str]:
+        """Return the paths changed within timeout (block until a change if None)."""
+        flags = inotify_simple.flags
+        changed = set()
+        for event in self.inotify.read(timeout=None if timeout is None else int(timeout * 1000)):
+            directory = self.watches.get(event.wd)
+            if directory is None or not event.name:
+                continue
+            path = event.name if directory == '.' else f'{directory}/{event.name}'
+            if directory in self.file_dirs and path not in self.paths:
+                continue
+            if event.mask & flags.ISDIR:
+                if event.mask & (flags.CREATE | flags.MOVED_TO):
+                    self._add_tree(path)
+                    changed.update(p.as_posix() for p in Path(path).rglob('*') if p.is_file())
+                continue
+            changed.add(path)
+        return changed
+
+def watch(builder: SiteBuilder, debounce: float = 0.1, on_rebuild: Optional[Callable[[], None]] = None) -> None:
+    """Rebuild affected outputs whenever a watched source changes, calling on_rebuild after each rebuild."""
+    watcher_class = InotifyWatcher if inotify_simple is not None else PollingWatcher
+    watcher = watcher_class(watch_paths(builder.config))
+    print(f"Watching {', '.join(watcher.paths)} for changes ({watcher.name}), press Ctrl+C to stop")
+    try:
+        while True:
+            changed = watcher.wait()
+            # Debounce: editors often write several times per save
+            while True:
+                more = watcher.wait(debounce)
+                if not more:
+                    break
+                changed |= more
+            
+            start = time.perf_counter()
+            try:
+                count = builder.rebuild(changed)
+            except Exception as e:
+                # Keep watching; the next save will most likely fix it
+                print(f"Error: rebuild failed: {e}")
+                continue
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            print(f"Updated {count} outputs in {elapsed_ms:.0f} ms ({', '.join(sorted(changed))})")
+            if watch_paths(builder.config) != watcher.paths:
+                # config.json added or removed a section plugin
+                watcher = watcher_class(watch_paths(builder.config))
+            if on_rebuild is not None:
+                on_rebuild()
+    except KeyboardInterrupt:
+        pass
+
+class OutputStore:
+    """Outputs of the preview build held in memory for the development server.
+    
+    The builder hands every output it writes to put() (see OUTPUT_STORE), so
+    the server answers from memory and never rescans the output tree; load()
+    reads the tree once, for the outputs of the build before serving.
+    """
+    
+    def __init__(self, root: Path):
+        self.root = root
+        self.files: Dict[str, bytes] = {}
+        # Outputs put or removed since the last take_changes()
+        self.changed = 0
+    
+    def load(self) -> None:
+        for directory, _, names in os.walk(self.root):
+            for name in names:
+                path = Path(directory) / name
+                self.files[path.relative_to(self.root).as_posix()] = path.read_bytes()
+    
+    def put(self, rel_path: str, data: bytes) -> None:
+        self.files[rel_path] = data
+        self.changed += 1
+    
+    def retain(self, rel_paths: Dict[str, Any]) -> None:
+        """Forget the files that are no longer outputs of the build."""
+        for rel_path in self.files.keys() - rel_paths.keys():
+            del self.files[rel_path]
+            self.changed += 1
+    
+    def take_changes(self) -> int:
+        """Return and reset the number of changes since the last call."""
+        changed = self.changed
+        self.changed = 0
+        return changed
+    
+    def get(self, rel_path: str) -> Optional[bytes]:
+        return self.files.get(rel_path)
+
+# Set by serve(); every output the build writes is also put into it
+OUTPUT_STORE: Optional[OutputStore] = None
+
+# Injected into served pages; the server pushes a message on this stream after every rebuild
+LIVE_RELOAD_PATH = '/__live-reload'
+LIVE_RELOAD_SCRIPT = '<script>new EventSource("{url}").onmessage = function () {{ location.reload(); }};</script>'
+
+def create_dev_server(address: Tuple[str, int], builder: SiteBuilder) -> Any:
+    """Create the development server for builder's outputs.
+    
+    The server modules are imported here rather than at module level, so
+    plain builds do not pay for loading them.
+    """
+    import http.server
+    import mimetypes
+    import threading
+    
+    class DevServer(http.server.ThreadingHTTPServer):
+        """Serve the outputs of a SiteBuilder from memory under the configured base_url, with live reload."""
+        
+        daemon_threads = True
+        
+        def __init__(self, address: Tuple[str, int], builder: SiteBuilder):
+            super().__init__(address, DevRequestHandler)
+            self.builder = builder
+            self.store = OutputStore(builder.dist)
+            self.store.load()
+            # Bumped after every rebuild that changed outputs; event streams wait on it
+            self.generation = 0
+            self.changed = threading.Condition()
+        
+        def reload(self) -> None:
+            """Drop removed outputs and tell every open page to reload if anything changed."""
+            self.store.retain(self.builder.outputs)
+            if self.store.take_changes():
+                with self.changed:
+                    self.generation += 1
+                    self.changed.notify_all()
+    
+    class DevRequestHandler(http.server.BaseHTTPRequestHandler):
+        server: DevServer
+        
+        def do_GET(self) -> None:
+            self.respond()
+        
+        def do_HEAD(self) -> None:
+            self.respond(send_body=False)
+        
+        def respond(self, send_body: bool = True) -> None:
+            base_url = self.server.builder.config.get('base_url', '')
+            path = unquote(urlsplit(self.path).path)
+            if path == base_url + LIVE_RELOAD_PATH and send_body:
+                return self.stream_reloads()
+            if not path.startswith(base_url + '/'):
+                # The site only exists under base_url
+                self.send_response(302)
+                self.send_header('Location', base_url + '/')
+                self.end_headers()
+                return
+            rel_path = path[len(base_url) + 1:]
+            if rel_path == '' or rel_path.endswith('/'):
+                rel_path += 'index.html'
+            body = self.server.store.get(rel_path)
+            if body is None and self.server.store.get(f'{rel_path}/index.html') is not None:
+                self.send_response(301)
+                self.send_header('Location', f'{path}/')
+                self.end_headers()
+                return
+            if body is None:
+                self.send_error(404, f'{rel_path} is not an output of this site')
+                return
+            content_type = mimetypes.guess_type(rel_path)[0] or 'application/octet-stream'
+            if content_type == 'text/html':
+                script = LIVE_RELOAD_SCRIPT.format(url=base_url + LIVE_RELOAD_PATH).encode('utf-8')
+                end = body.rfind(b'</body>')
+                body = body[:end] + script + body[end:] if end != -1 else body + script
+            if content_type.startswith('text/') or content_type in ('application/javascript', 'application/json', 'image/svg+xml'):
+                content_type += '; charset=utf-8'
+            self.send_response(200)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            self.send_header('Cache-Control', 'no-cache')
+            self.end_headers()
+            if send_body:
+                self.wfile.write(body)
+        
+        def stream_reloads(self) -> None:
+            """Server-sent events: one 'reload' message per rebuild, comments in between to detect closed pages."""
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/event-stream')
+            self.send_header('Cache-Control', 'no-cache')
+            self.end_headers()
+            server = self.server
+            generation = server.generation
+            try:
+                while True:
+                    with server.changed:
+                        server.changed.wait_for(lambda: server.generation != generation, timeout=15)
+                    if server.generation != generation:
+                        generation = server.generation
+                        self.wfile.write(b'data: reload\n\n')
+                    else:
+                        self.wfile.write(b': keep-alive\n\n')
+                    self.wfile.flush()
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+        
+        def log_request(self, code: Any = '-', size: Any = '-') -> None:
+            # Only failed requests; every page load would otherwise print a line
+            if isinstance(code, int) and code >= 400:
+                super().log_request(code, size)
+    
+    return DevServer(address, builder)
+
+def serve(builder: SiteBuilder, host: str = '127.0.0.1', port: int = 8000) -> None:
+    """Serve the built site from memory and rebuild and reload open pages on every source change."""
+    global OUTPUT_STORE
+    import threading
+    
+    server = create_dev_server((host, port), builder)
+    OUTPUT_STORE = server.store
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    print(f"Serving on http://{host}:{port}{builder.config.get('base_url', '')}/")
+    try:
+        watch(builder, on_rebuild=server.reload)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Generate the static site into dist/.')
+    parser.add_argument('command', nargs='?', choices=('build', 'watch', 'serve'), default='build',
+                        help='build the site once (default), rebuild on every source change, or also serve it '
+                             'under base_url with live reload')
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+                        help='number of render worker processes (0 = one per CPU core, default: 1)')
+    parser.add_argument('--clean', action='store_true',
+                        help='ignore the build manifest and regenerate every output')
+    parser.add_argument('--host', default='127.0.0.1', help='address the serve command listens on (default: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=8000, help='port of the serve command (default: 8000)')
+    parser.add_argument('--profile', action='store_true',
+                        help='record stage and page timings, output sizes and peak memory (tracemalloc) '
+                             'into a JSON report and print a summary')
+    parser.add_argument('--profile-output', default='build-profile.json', metavar='REPORT',
+                        help='path of the --profile report (default: build-profile.json)')
+    return parser.parse_args(argv)
+
+def main(argv: Optional[List[str]] = None):
+    global PROFILER
+    args = parse_args(argv)
+    workers = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+    
+    if args.profile:
+        PROFILER = BuildProfiler()
+        tracemalloc.start()
+    
+    if args.command == 'serve':
+        # Previewing must not overwrite the deploy tree
+        builder = SiteBuilder(PREVIEW_DIR, workers, clean=args.clean, manifest_file=PREVIEW_MANIFEST_FILE)
+    else:
+        builder = SiteBuilder(Path('dist'), workers, clean=args.clean)
+    rendered = builder.build()
+    print(f"Rendered {rendered} of {builder.total_jobs} pages")
+    
+    if PROFILER is not None:
+        report = PROFILER.report()
+        tracemalloc.stop()
+        Path(args.profile_output).write_text(json.dumps(report, indent=2), encoding='utf-8')
+        print(PROFILER.summary(report))
+        print(f"Profile written to {args.profile_output}")
+        # Watch mode rebuilds are not profiled
+        PROFILER = None
+    
+    if args.command == 'watch':
+        watch(builder)
+    elif args.command == 'serve':
+        serve(builder, args.host, args.port)
 
 if __name__ == '__main__':
     main()